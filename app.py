@@ -1,19 +1,31 @@
 import logging
-import requests
 import os
+import httpx
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 import time
-from utils.sarvam.sarvam_helper import transcribe_with_sarvam
-from parameters import transcripts_collection, task_tracker, s3_client, AWS_BUCKET_NAME, append_log_to_db
-from datetime import datetime
-from werkzeug.utils import secure_filename
-from io import BytesIO
+import asyncio
+from utils.sarvam.sarvam_helper import transcribe_with_sarvam, get_cached_transcript, is_transcript_cached, chunk_partial_result, format_transcription_response
+from utils.jobs.job_helper import create_job, update_job, log_job, get_job, send_webhook, start_job, drain_jobs
+from utils.jobs.writer_helper import close_job_writer
+from utils.jobs.manifest_helper import normalize_manifest, process_manifest
+from utils.cache.cache_helper import compute_audio_hash
+from utils.storage.s3_helper import stream_to_s3, iter_upload_file, iter_url, iter_s3_body, UploadTooLargeError
+from utils.storage.spool_helper import spool_stream, archive_in_background, drain_background_archives
+from utils.configs.config import INGEST_MODE, S3_ARCHIVE, AUDIO_POOL_WARM, RESPONSE_SEGMENT_FORMAT, ADMISSION_QUEUE_TIMEOUT, ADMISSION_SPOOL_THRESHOLD
+from utils.admission.admission_helper import get_memory_budget, estimate_request_bytes, AdmissionRejected, WAV_HEADER_PROBE_BYTES
+from utils.audio.wav_helper import parse_wav_header
+from utils.sarvam.client_helper import init_http_client, close_http_client
+from utils.sarvam.segment_helper import FastJSONResponse, dumps_json, segments_as, SEGMENT_FORMATS
+from utils.audio.executor_helper import warm_audio_pool, get_audio_pool_stats, shutdown_audio_executor
+from utils.metrics.metrics_helper import metrics_payload, stage_timer, timed_stage
+from utils.tracing.tracing_helper import start_span, extract_context, shutdown_tracing
+from utils.logs.log_helper import configure_logging, shutdown_logging, log_context
+from opentelemetry.trace import SpanKind
 import uuid
-from bson import ObjectId
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,6 +34,28 @@ load_dotenv()
 app = FastAPI(title="Sarvam Transcription API", description="API for audio transcription using Sarvam AI")
 
 
+@app.on_event("startup")
+async def startup_event():
+    # Log records are queued here and written by a listener thread, off the event loop
+    configure_logging()
+    # One pooled client for the app lifetime instead of one per chunk
+    app.state.http_client = await init_http_client()
+    # Spawn the audio workers now so the first long recording doesn't wait on process start-up
+    if AUDIO_POOL_WARM:
+        await warm_audio_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await drain_jobs()
+    await close_job_writer()  # After the jobs, so their final writes are flushed
+    await drain_background_archives()
+    await close_http_client()
+    shutdown_audio_executor()
+    shutdown_tracing()
+    shutdown_logging()
+
+
 # Middleware for CORS
 app.add_middleware(
     CORSMiddleware,
@@ -37,11 +71,23 @@ app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*", "localhost"])
 
 @app.middleware("http")
 async def add_request_logging(request: Request, call_next):
-    logging.info(f"Incoming request: {request.method} {request.url}")
-    start_time = time.time()
-    response = await call_next(request)
-    duration = time.time() - start_time
-    logging.info(f"Processed request: {request.method} {request.url} in {duration:.2f} seconds with status {response.status_code}")
+    # Every record logged while handling the request (and by jobs it starts) carries its id
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    with log_context(request_id=request_id):
+        logging.info("Incoming request: %s %s", request.method, request.url)
+        start_time = time.time()
+        # Continue the caller's trace (Celery worker, producer) if it sent a traceparent header
+        with start_span(
+            f"{request.method} {request.url.path}",
+            {"http.method": request.method, "http.target": request.url.path},
+            parent=extract_context(request.headers),
+            kind=SpanKind.SERVER
+        ) as span:
+            response = await call_next(request)
+            span.set_attribute("http.status_code", response.status_code)
+        duration = time.time() - start_time
+        logging.info("Processed request: %s %s in %.2f seconds with status %d", request.method, request.url, duration, response.status_code)
+    response.headers["X-Request-ID"] = request_id
     return response
 
 
@@ -50,6 +96,12 @@ async def upload_audio_for_transcription(
     request: Request,
     audio: UploadFile = File(None)
 ):
+    # Reserve memory before reading the body, so a burst of large uploads queues here instead of OOMing
+    try:
+        reservation = await admit_request(request, "transcribe")
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+
     try:
         # Extract source type from request
         form_data = await request.form()
@@ -58,27 +110,414 @@ async def upload_audio_for_transcription(
         if not source_type:
             return JSONResponse(content={"error": "Source type (file or url) is required"}, status_code=400)
 
+        # "direct" stages audio locally and transcribes it without the S3 round-trip
+        direct = form_data.get("ingest_mode", INGEST_MODE) == "direct"
+
+        segment_format = form_data.get("segment_format", RESPONSE_SEGMENT_FORMAT)
+        if segment_format not in SEGMENT_FORMATS:
+            return JSONResponse(content={"error": f"segment_format must be one of {', '.join(SEGMENT_FORMATS)}"}, status_code=400)
+
         if source_type == 'file':
-            response = await handle_file_upload(audio)
+            response = await handle_file_upload(audio, direct=direct, skip_if_cached=True)
 
         elif source_type == 'url':
             audio_url = form_data.get("audio_url")
             print(0)
-            response = await handle_url_upload(audio_url)
+            response = await handle_url_upload(audio_url, request.app.state.http_client, direct=direct)
             print(response)
 
         else:
             return JSONResponse(content={"error": "Invalid source type. Please specify either 'file' or 'url'."}, status_code=400)
 
-        lang = await get_audio_for_transcription(response['s3_key'])
-        return lang
+        if "error" in response:
+            return JSONResponse(content=response, status_code=400)
+
+        lang = await get_audio_for_transcription(
+            response['s3_key'],
+            http_client=request.app.state.http_client,
+            audio_hash=response.get('audio_hash'),
+            spool=response.get('spool'),
+            segment_format=segment_format,
+            reservation=reservation,
+        )
+        return FastJSONResponse(content=lang)
+
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
 
     except Exception as e:
         logging.error(f"Error in transcribe_audio_with_sarvam API: {str(e)}")
         return JSONResponse(content={"error": f"Server Error: {str(e)}"}, status_code=500)
 
-async def handle_file_upload(audio: UploadFile):
-    """Handles file-based audio uploads."""
+    finally:
+        reservation.release()
+
+@app.post("/sarvam/transcribe/stream")
+async def stream_audio_transcription(
+    request: Request,
+    audio: UploadFile = File(None)
+):
+    """
+    Same input as /sarvam/transcribe, but streams each chunk's segments as soon
+    as that chunk finishes, followed by the merged summary. Responds with
+    Server-Sent Events when the client accepts text/event-stream, NDJSON otherwise.
+    """
+    try:
+        reservation = await admit_request(request, "transcribe/stream")
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+
+    response = {}
+    try:
+        form_data = await request.form()
+        source_type = form_data.get("source_type")
+        direct = form_data.get("ingest_mode", INGEST_MODE) == "direct"
+        http_client = request.app.state.http_client
+
+        if source_type == 'file':
+            response = await handle_file_upload(audio, direct=direct, skip_if_cached=True)
+        elif source_type == 'url':
+            response = await handle_url_upload(form_data.get("audio_url"), http_client, direct=direct)
+        else:
+            reservation.release()
+            return JSONResponse(content={"error": "Source type must be either 'file' or 'url'."}, status_code=400)
+
+        if "error" in response:
+            reservation.release()
+            return JSONResponse(content=response, status_code=400)
+
+        # Size the reservation now, while the answer can still be a 503
+        if response["s3_key"] is not None and not await is_transcript_cached(response.get("audio_hash")):
+            # Kept with the upload so get_audio_for_transcription doesn't probe S3 again
+            _, response["in_memory"] = await reserve_for_audio(response["s3_key"], response.get("spool"), reservation)
+
+    except AdmissionRejected as e:
+        reservation.release()
+        if response.get("spool") is not None:
+            response["spool"].release()
+        return admission_rejected_response(e)
+
+    except Exception as e:
+        reservation.release()
+        if response.get("spool") is not None:
+            response["spool"].release()
+        logging.error(f"Error in stream_audio_transcription API: {str(e)}")
+        return JSONResponse(content={"error": f"Server Error: {str(e)}"}, status_code=500)
+
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    # The reservation is held until the stream ends
+    return StreamingResponse(
+        stream_transcription(response, http_client, sse, reservation=reservation),
+        media_type="text/event-stream" if sse else "application/x-ndjson"
+    )
+
+
+def encode_stream_event(seq: int, event: str, payload: dict, sse: bool) -> str:
+    body = dumps_json({"seq": seq, "event": event, **payload}).decode("utf-8")
+    if sse:
+        return f"id: {seq}\nevent: {event}\ndata: {body}\n\n"
+    return body + "\n"
+
+
+async def stream_transcription(upload: dict, http_client, sse: bool, reservation=None):
+    """
+    Runs the transcription in a task and yields a "chunk" event per settled
+    chunk (segments re-based to absolute time) and a final "summary" or "error".
+    """
+    events = asyncio.Queue()
+
+    async def on_chunk(chunk, result, num_chunks):
+        await events.put(("chunk", {"num_chunks": num_chunks, **chunk_partial_result(chunk, result)}))
+
+    async def run():
+        try:
+            final = await get_audio_for_transcription(
+                upload["s3_key"],
+                http_client=http_client,
+                audio_hash=upload.get("audio_hash"),
+                spool=upload.get("spool"),
+                on_chunk=on_chunk,
+                reservation=reservation,
+                in_memory=upload.get("in_memory"),
+            )
+            await events.put(("error", final) if "error" in final else ("summary", final))
+        except Exception as e:
+            await events.put(("error", {"error": str(e)}))
+
+    task = asyncio.create_task(run())
+    seq = 0
+    try:
+        while True:
+            event, payload = await events.get()
+            yield encode_stream_event(seq, event, payload, sse)
+            seq += 1
+            if event != "chunk":
+                break
+    finally:
+        # Client went away: stop spending upstream calls on a stream nobody reads
+        if not task.done():
+            task.cancel()
+        # Let the cancelled task unwind (and drop its audio buffers) before its bytes go back to the budget
+        await asyncio.gather(task, return_exceptions=True)
+        if reservation is not None:
+            reservation.release()
+
+
+async def admit_request(request: Request, label: str):
+    """
+    Reserves the estimated memory of a transcription request from its
+    Content-Length, waiting up to ADMISSION_QUEUE_TIMEOUT for room.
+    get_audio_for_transcription refines the estimate once the audio is known.
+    """
+    size = int(request.headers.get("content-length") or 0)
+    estimate = estimate_request_bytes(size, in_memory=size <= ADMISSION_SPOOL_THRESHOLD)
+    return await get_memory_budget().reserve(estimate, timeout=ADMISSION_QUEUE_TIMEOUT, label=label)
+
+
+def admission_rejected_response(e: AdmissionRejected):
+    return JSONResponse(
+        content={"error": f"Server busy, retry later: {str(e)}", "retry_after": e.retry_after},
+        status_code=503,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+@app.post("/sarvam/jobs")
+async def submit_transcription_job(
+    request: Request,
+    audio: UploadFile = File(None)
+):
+    """
+    Queues a transcription and returns its job id straight away. Poll
+    GET /sarvam/jobs/{job_id}, or pass callback_url to be notified on completion.
+    """
+    try:
+        form_data = await request.form()
+        source_type = form_data.get("source_type")
+        callback_url = form_data.get("callback_url")
+        direct = form_data.get("ingest_mode", INGEST_MODE) == "direct"
+        http_client = request.app.state.http_client
+
+        if source_type == 'file':
+            # The upload is only readable during this request, so ingest it before returning
+            upload = await handle_file_upload(audio, direct=direct)
+            if "error" in upload:
+                return JSONResponse(content=upload, status_code=400)
+            job_id = await create_job(upload["s3_key"], audio.filename, source_type, callback_url)
+            start_job(run_transcription_job(job_id, http_client, upload=upload, callback_url=callback_url), job_id=job_id)
+
+        elif source_type == 'url':
+            audio_url = form_data.get("audio_url")
+            if not audio_url:
+                return JSONResponse(content={"error": "Audio URL is required when source type is 'url'"}, status_code=400)
+            file_name = os.path.basename(audio_url.split('?')[0])
+            job_id = await create_job(None, file_name, source_type, callback_url, audio_url=audio_url)
+            start_job(run_transcription_job(job_id, http_client, audio_url=audio_url, direct=direct, callback_url=callback_url), job_id=job_id)
+
+        else:
+            return JSONResponse(content={"error": "Source type must be either 'file' or 'url'."}, status_code=400)
+
+        logging.info(f"Queued transcription job {job_id} ({source_type})")
+        return JSONResponse(content={"job_id": job_id, "status": "queued"}, status_code=202)
+
+    except Exception as e:
+        logging.error(f"Error in submit_transcription_job API: {str(e)}")
+        return JSONResponse(content={"error": f"Server Error: {str(e)}"}, status_code=500)
+
+
+@app.get("/sarvam/jobs/{job_id}")
+async def get_transcription_job(job_id: str, segment_format: str = RESPONSE_SEGMENT_FORMAT):
+    """
+    Returns a job's status, the chunks finished so far and, once completed, the
+    results. segment_format=columnar returns the final audio_segments column-wise.
+    """
+    job = await get_job(job_id)
+    if job is None:
+        return JSONResponse(content={"error": "Job not found"}, status_code=404)
+    results = job.get("results")
+    if segment_format == "columnar" and isinstance(results, dict) and "audio_segments" in results:
+        job["results"] = {**results, "audio_segments": segments_as(results["audio_segments"], segment_format)}
+    return FastJSONResponse(content=job)
+
+
+@app.get("/sarvam/queue/stores")
+async def queue_store_stats():
+    """Per-store fair-scheduling state of the Celery queue: queued per lane, in flight, waits, throughput."""
+    from utils.celery.fair_scheduler import fair_stats
+    try:
+        return await asyncio.to_thread(fair_stats)
+    except Exception as e:
+        logging.error("Could not read fair-scheduling stats: %s", str(e))
+        return JSONResponse(content={"error": f"Queue stats unavailable: {str(e)}"}, status_code=503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: per-stage timings, audio/byte throughput, upstream errors."""
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/sarvam/admission")
+async def admission_stats():
+    """Memory budget, reserved and waiting bytes and current reservations, for autoscaling."""
+    return get_memory_budget().stats()
+
+
+@app.get("/sarvam/audio-pool")
+async def audio_pool_stats():
+    """Queue depth and task latency of the audio process pool."""
+    return get_audio_pool_stats()
+
+
+@app.post("/sarvam/manifest")
+async def submit_manifest(request: Request):
+    """
+    Queues every recording in an {"access_urls": [...]} manifest as one job.
+    URLs are de-duplicated and run through one bounded pipeline; the job's
+    results hold one aggregated entry per merged_audio_id, chunks in
+    conversation order. Poll GET /sarvam/jobs/{job_id} or pass callback_url.
+    """
+    try:
+        manifest = await request.json()
+        groups = normalize_manifest(manifest)
+        if not groups:
+            return JSONResponse(content={"error": "No valid access_urls entries in the manifest"}, status_code=400)
+
+        recordings = sum(len(group["access_url_chunks"]) for group in groups)
+        callback_url = manifest.get("callback_url")
+        job_id = await create_job(None, "manifest", "manifest", callback_url)
+        await update_job(job_id, fields={"chunks_total": recordings})
+        start_job(run_manifest_job(job_id, manifest, request.app.state.http_client, callback_url), job_id=job_id)
+
+        logging.info(f"Queued manifest job {job_id} with {recordings} recordings across {len(groups)} merged audio ids")
+        return JSONResponse(content={
+            "job_id": job_id,
+            "status": "queued",
+            "merged_audio_ids": [group["merged_audio_id"] for group in groups],
+            "recordings": recordings
+        }, status_code=202)
+
+    except Exception as e:
+        logging.error(f"Error in submit_manifest API: {str(e)}")
+        return JSONResponse(content={"error": f"Server Error: {str(e)}"}, status_code=500)
+
+
+async def transcribe_audio_url(audio_url: str, http_client) -> dict:
+    """Ingests and transcribes one URL, raising instead of returning an error body."""
+    upload = await handle_url_upload(audio_url, http_client, direct=INGEST_MODE == "direct")
+    if "error" in upload:
+        raise RuntimeError(upload["error"])
+    response = await get_audio_for_transcription(
+        upload["s3_key"],
+        http_client=http_client,
+        audio_hash=upload.get("audio_hash"),
+        spool=upload.get("spool"),
+    )
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response
+
+
+async def run_manifest_job(transcript_id: str, manifest: dict, http_client, callback_url: str = None):
+    """Background body of a manifest job."""
+    async def on_url_done(audio_url, ok):
+        await update_job(transcript_id, increments={"chunks_done": 1})
+
+    try:
+        await update_job(transcript_id, "in-progress")
+        results = await process_manifest(manifest, lambda url: transcribe_audio_url(url, http_client), on_url_done=on_url_done)
+        await update_job(transcript_id, "completed", {"results": results})
+        payload = {"job_id": transcript_id, "status": "completed", "results": results}
+    except Exception as e:
+        logging.error(f"Manifest job {transcript_id} failed: {str(e)}")
+        payload = {"job_id": transcript_id, "status": "failed", "error": str(e)}
+        try:
+            await update_job(transcript_id, "failed", {"error": str(e)})
+        except Exception as db_error:
+            logging.error(f"Could not record failure of job {transcript_id}: {str(db_error)}")
+
+    if callback_url:
+        await send_webhook(http_client, callback_url, payload)
+
+
+def job_chunk_recorder(transcript_id: str):
+    """on_chunk callback that saves each settled chunk into the job record as a partial result."""
+    async def on_chunk(chunk, result, num_chunks):
+        await update_job(
+            transcript_id,
+            fields={
+                "chunks_total": num_chunks,
+                f"partial_results.{chunk['index']}": chunk_partial_result(chunk, result)
+            },
+            increments={"chunks_done": 1}
+        )
+    return on_chunk
+
+
+async def run_transcription_job(transcript_id: str, http_client, upload: dict = None, audio_url: str = None, direct: bool = False, callback_url: str = None):
+    """Background body of a job: ingest (URL jobs), transcribe, store results and fire the webhook."""
+    try:
+        await update_job(transcript_id, "in-progress")
+        await log_job(transcript_id, "INFO", "Started transcription process")
+
+        if upload is None:
+            upload = await handle_url_upload(audio_url, http_client, direct=direct)
+            if "error" in upload:
+                raise RuntimeError(upload["error"])
+            await update_job(transcript_id, fields={"s3_key": upload["s3_key"]})
+
+        response = await get_audio_for_transcription(
+            upload["s3_key"],
+            http_client=http_client,
+            audio_hash=upload.get("audio_hash"),
+            spool=upload.get("spool"),
+            on_chunk=job_chunk_recorder(transcript_id),
+        )
+        if "error" in response:
+            raise RuntimeError(response["error"])
+
+        await update_job(transcript_id, "completed", {"results": response["results"]})
+        await log_job(transcript_id, "INFO", "Transcription and diarization completed successfully.")
+        payload = {"job_id": transcript_id, "status": "completed", "results": response["results"]}
+
+    except Exception as e:
+        logging.error(f"Transcription job {transcript_id} failed: {str(e)}")
+        payload = {"job_id": transcript_id, "status": "failed", "error": str(e)}
+        try:
+            await update_job(transcript_id, "failed", {"error": str(e)})
+            await log_job(transcript_id, "ERROR", f"Error processing transcript {transcript_id}: {str(e)}")
+        except Exception as db_error:
+            logging.error(f"Could not record failure of job {transcript_id}: {str(db_error)}")
+
+    if callback_url:
+        await send_webhook(http_client, callback_url, payload)
+
+
+async def stage_upload(chunks, s3_key: str):
+    """
+    Stages audio in a local spool file for direct transcription.
+    S3 archival, when enabled, runs in the background from the same spool.
+    """
+    spool = await spool_stream(chunks)
+    if S3_ARCHIVE and not await is_transcript_cached(spool.audio_hash):
+        archive_in_background(spool, s3_key)
+    logging.info(f"Staged audio in {spool.path} for direct transcription (archive to {s3_key}: {S3_ARCHIVE})")
+    return {
+        "message": "Audio staged for direct transcription",
+        "s3_key": s3_key,
+        "audio_hash": spool.audio_hash,
+        "spool": spool,
+        "status": "staged"
+    }
+
+@timed_stage("ingest")
+async def handle_file_upload(audio: UploadFile, direct: bool = False, skip_if_cached: bool = False):
+    """
+    Handles file-based audio uploads. skip_if_cached is for callers that
+    serve the transcript straight from the cache: already-transcribed audio
+    is then not uploaded at all, and the result has no s3_key.
+    """
     if not audio:
         return {"error": "No file part"}
 
@@ -88,19 +527,33 @@ async def handle_file_upload(audio: UploadFile):
     if not audio.filename.endswith(('.wav', '.mp3')):
         return {"error": "Invalid file type. Only WAV and MP3 files are allowed."}
 
+    from werkzeug.utils import secure_filename
     filename = secure_filename(audio.filename)
     s3_key = f"temp/{uuid.uuid4()}/{filename}"
 
     try:
-        # Read the audio file into memory
-        file_content = await audio.read()
-        
-        # Convert the bytes into a file-like object
-        file_obj = BytesIO(file_content)
-
-        # Upload to S3
-        s3_client.upload_fileobj(file_obj, AWS_BUCKET_NAME, s3_key)
-        
+        # Starlette already spools the upload to disk; hash it there without loading it into memory
+        audio_hash = await asyncio.to_thread(compute_audio_hash, audio.file)
+
+        # Identical audio was already transcribed and the caller reads the cache right away; skip the S3 upload entirely
+        if skip_if_cached and await is_transcript_cached(audio_hash):
+            logging.info(f"Transcript cached for {filename} (sha256 {audio_hash}); skipping S3 upload")
+            return {
+                "message": "Audio file already transcribed",
+                "s3_key": None,
+                "audio_hash": audio_hash,
+                "status": "cached"
+            }
+
+        await audio.seek(0)
+        if direct:
+            return await stage_upload(iter_upload_file(audio), s3_key)
+
+        # Stream to S3 in bounded parts
+        await stream_to_s3(iter_upload_file(audio), s3_key)
+
+    except UploadTooLargeError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Failed to upload to S3: {str(e)}"}
 
@@ -121,30 +574,34 @@ async def handle_file_upload(audio: UploadFile):
         "message": "Audio file uploaded successfully",
         # "transcript_id": str(transcript_id),
         "s3_key": s3_key,
+        "audio_hash": audio_hash,
         "status": "queued"
     }
 
-async def handle_url_upload(audio_url: str):
-    """Handles URL-based audio uploads."""
+@timed_stage("ingest")
+async def handle_url_upload(audio_url: str, http_client: httpx.AsyncClient, direct: bool = False):
+    """Handles URL-based audio uploads by streaming the download straight into S3."""
     if not audio_url:
         return {"error": "Audio URL is required when source type is 'url'"}
 
-    try:
-        response = requests.get(audio_url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Failed to download the audio from URL: {str(e)}"}
-
-    audio_data = BytesIO(response.content)
     filename = os.path.basename(audio_url.split('?')[0])
     s3_key = f"temp/{uuid.uuid4()}/{filename}"
 
     try:
+        if direct:
+            return await stage_upload(iter_url(audio_url, http_client), s3_key)
+
         logging.info(f"Uploading audio from URL {audio_url} to S3 with key {s3_key}")
 
-        # Upload to S3
-        s3_client.upload_fileobj(audio_data, AWS_BUCKET_NAME, s3_key)
-        
+        # The hash is only known once the stream ends, so cache hits skip the
+        # S3 download and upstream calls later rather than this upload
+        upload = await stream_to_s3(iter_url(audio_url, http_client), s3_key)
+        audio_hash = upload["audio_hash"]
+
+    except httpx.HTTPError as e:
+        return {"error": f"Failed to download the audio from URL: {str(e)}"}
+    except UploadTooLargeError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Failed to upload to S3: {str(e)}"}
 
@@ -162,17 +619,62 @@ async def handle_url_upload(audio_url: str):
         "message": "Audio file from URL processed successfully",
         # "transcript_id": str(transcript_id),
         "s3_key": s3_key,
+        "audio_hash": audio_hash,
         "status": "queued"
     }
 
 
+async def reserve_for_audio(s3_key: str, spool=None, reservation=None):
+    """
+    Sizes the audio (the spool, or the S3 object and its WAV header from a
+    ranged GET) and reserves its estimated memory before it is loaded.
+    Jobs and manifests pass no reservation and get a new one, queueing for
+    room rather than being shed; a request's admission reservation is
+    resized, waiting up to ADMISSION_QUEUE_TIMEOUT (AdmissionRejected after).
+    Returns (reservation, whether the audio will be read into memory).
+    """
+    compressed = s3_key.lower().endswith(".mp3")
+    if spool is not None:
+        size, in_memory = spool.size, False
+        wav_info = parse_wav_header(spool.map())
+    else:
+        from parameters import s3_client, AWS_BUCKET_NAME  # S3/Mongo clients open on first use
+        probe = await asyncio.to_thread(
+            s3_client.get_object, Bucket=AWS_BUCKET_NAME, Key=s3_key, Range=f"bytes=0-{WAV_HEADER_PROBE_BYTES - 1}"
+        )
+        header = await asyncio.to_thread(probe['Body'].read)
+        size = int(probe.get("ContentRange", "").rpartition("/")[2] or probe.get("ContentLength", 0))
+        in_memory = size <= ADMISSION_SPOOL_THRESHOLD
+        wav_info = parse_wav_header(header)
+        if wav_info is not None:
+            # The probe only holds the start of the data chunk; the object size bounds the rest
+            wav_info = wav_info._replace(data_size=max(size - wav_info.data_offset, 0))
+
+    estimate = estimate_request_bytes(size, wav_info, compressed, in_memory)
+    if reservation is None:
+        reservation = await get_memory_budget().reserve(estimate, shed=False, label=s3_key)
+    else:
+        await reservation.resize(estimate, timeout=ADMISSION_QUEUE_TIMEOUT)
+    return reservation, in_memory
+
+
 async def get_audio_for_transcription(
     s3_key: str, 
     language_code: str = Form(""),
     model: str = Form("saarika:v2"),
     with_diarization: bool = Form(True),
     with_timestamps: bool = Form(False),
+    http_client=None,
+    audio_hash: str = None,
+    spool=None,
+    on_chunk=None,
+    segment_format: str = "rows",
+    reservation=None,
+    in_memory: bool = None,
 ):
+    # Jobs and manifests pass no reservation: they reserve here, queueing for room rather than being shed.
+    # in_memory is reserve_for_audio's answer when the caller already sized the reservation with it.
+    owns_reservation = reservation is None
     try:
         
         # append_log_to_db(transcript_id, "INFO", "Started transcription process")
@@ -192,36 +694,53 @@ async def get_audio_for_transcription(
             # append_log_to_db(transcript_id, "ERROR", "Missing S3 key in the document")
 
         current_dir = os.getcwd()
-        local_file_path = os.path.join(current_dir, f"audio/{s3_key.split('/')[-1]}")
+        local_file_path = os.path.join(current_dir, f"audio/{(s3_key or '').split('/')[-1]}")
         try:
-            s3_object = s3_client.get_object(Bucket=AWS_BUCKET_NAME, Key=s3_key)
-
-            audio_data = s3_object['Body'].read()
-            # audio_file = BytesIO(audio_data)
+            # Serve repeated audio from the transcript cache without touching S3
+            # (misses are counted once, inside transcribe_with_sarvam)
+            response = await get_cached_transcript(audio_hash) if await is_transcript_cached(audio_hash) else None
+
+            if response is None:
+                if s3_key is None and spool is None:
+                    # The upload was skipped for a cached transcript that has since been evicted
+                    raise HTTPException(status_code=410, detail="Cached transcript is no longer available; submit the audio again")
+
+                # Wait for room for the whole transcription before anything is loaded
+                if reservation is None or in_memory is None:
+                    reservation, in_memory = await reserve_for_audio(s3_key, spool, reservation)
+
+                if spool is not None:
+                    # Direct mode: map the staged spool instead of downloading from S3
+                    audio_data = spool.map()
+                else:
+                    from parameters import s3_client, AWS_BUCKET_NAME  # S3/Mongo clients open on first use
+                    with stage_timer("s3_get"):
+                        s3_object = await asyncio.to_thread(s3_client.get_object, Bucket=AWS_BUCKET_NAME, Key=s3_key)
+                        if in_memory:
+                            audio_data = await asyncio.to_thread(s3_object['Body'].read)
+                        else:
+                            # Large download: spill to a disk spool and map it (released in the finally below)
+                            spool = await spool_stream(iter_s3_body(s3_object['Body']))
+                            audio_data = spool.map()
+                # audio_file = BytesIO(audio_data)
+
+                # append_log_to_db(transcript_id, "INFO", f"Sending file {s3_key} to sarvam API")
+                # task_tracker.update_one(
+                #     {'transcript_id': transcript_id},
+                #     {"$set": {"status": "queued", "type": "sarvam"}}
+                # )
 
-            # append_log_to_db(transcript_id, "INFO", f"Sending file {s3_key} to sarvam API")
-            # task_tracker.update_one(
-            #     {'transcript_id': transcript_id},
-            #     {"$set": {"status": "queued", "type": "sarvam"}}
-            # )
-    
-            response = await transcribe_with_sarvam(
-                audio_data,
-            )
+                response = await transcribe_with_sarvam(
+                    audio_data,
+                    http_client=http_client,
+                    audio_hash=audio_hash,
+                    on_chunk=on_chunk,
+                )
 
             if response["message"] == "success":
                 logging.info("Transcription successful for the uploaded file")
 
-                audio_segments = response.get("audio_segments", "")
-                full_transcription = response.get("full_transcription", "")
-                full_diarization = response.get("full_diarization", [])
-                translated_transcript =  response.get("translated_transcript", "")
-
-                final_response = {"results": {
-                    "transcripts": full_transcription,
-                    "translated_transcript" : translated_transcript,
-                    "audio_segments": audio_segments,
-                }}
+                final_response = format_transcription_response(response, segment_format)
 
                 # append_log_to_db(transcript_id, "INFO", "Transcription and diarization completed successfully.")
                 # transcripts_collection.update_one(
@@ -244,7 +763,7 @@ async def get_audio_for_transcription(
                 return final_response
             else:
                 logging.error("Transcription failed: %s", response["error"])
-                error_message = f"Error from sarvam API: {response.text}"
+                # error_message = f"Error from sarvam API: {response['error']}"
                 # append_log_to_db(transcript_id, "ERROR", error_message)
                 # transcripts_collection.update_one(
                 #     {"_id": ObjectId(transcript_id)},
@@ -256,6 +775,9 @@ async def get_audio_for_transcription(
                 # )
                 raise HTTPException(status_code=500, detail=response["error"])
 
+        except AdmissionRejected:
+            raise
+
         except Exception as e:
             logging.error("HTTPException: %s", e.detail)
             # error_message = f"Error processing transcript {transcript_id}: {str(e)}"
@@ -271,15 +793,22 @@ async def get_audio_for_transcription(
             raise e
 
         finally:
-            if os.path.exists(local_file_path):
+            if spool is not None:
+                spool.release()
+            if owns_reservation and reservation is not None:
+                reservation.release()
+            if os.path.isfile(local_file_path):
                 try:
                     os.remove(local_file_path)
                     # append_log_to_db(transcript_id, "INFO", f"Deleted local file: {local_file_path}")
-                except Exception as e:
+                except Exception:
                     pass
                     # append_log_to_db(transcript_id, "ERROR", f"Error deleting local file: {str(e)}")
         # print(7)
 
+    except AdmissionRejected:
+        raise  # Answered with 503 + Retry-After by the endpoint
+
     except Exception as e:
         logging.error("Unexpected error during transcription: %s", str(e))
         # append_log_to_db("global", "ERROR", f"Error during execution: {str(e)}")
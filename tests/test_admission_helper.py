@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from utils.admission import admission_helper
+from utils.admission.admission_helper import MemoryBudget, AdmissionRejected, estimate_request_bytes
+from utils.audio.wav_helper import WavInfo
+
+
+def test_concurrent_growth_waits_within_budget():
+    async def scenario():
+        budget = MemoryBudget(100, 8)
+        # Two URL requests admitted on the small pre-download estimate
+        first = await budget.reserve(10, label="url-1")
+        second = await budget.reserve(10, label="url-2")
+
+        grow_first = asyncio.create_task(first.resize(80, timeout=5))
+        grow_second = asyncio.create_task(second.resize(80, timeout=5))
+        await asyncio.sleep(0.01)
+        assert grow_first.done() and not grow_second.done()
+        assert budget.reserved <= budget.budget
+
+        first.release()
+        await asyncio.wait_for(grow_second, 1)
+        assert second.nbytes == 80
+        assert budget.reserved == 80
+        second.release()
+        assert budget.reserved == 0
+
+    asyncio.run(scenario())
+
+
+def test_growth_past_budget_times_out():
+    async def scenario():
+        budget = MemoryBudget(100, 8)
+        holder = await budget.reserve(90)
+        request = await budget.reserve(10)
+        with pytest.raises(AdmissionRejected):
+            await request.resize(50, timeout=0.05)
+        assert budget.reserved == 90
+        request.release()
+        holder.release()
+        assert budget.reserved == 0
+
+    asyncio.run(scenario())
+
+
+def test_estimate_charges_in_flight_payloads_not_the_audio_pool(monkeypatch):
+    monkeypatch.setattr(admission_helper, "PREPROCESS_AUDIO", True)
+    monkeypatch.setattr(admission_helper, "AUDIO_POOL_WORKERS", 8)
+    monkeypatch.setattr(admission_helper, "SARVAM_REQUEST_CONCURRENCY", 4)
+    monkeypatch.setattr(admission_helper, "CHUNK_DURATION", 300)
+    monkeypatch.setattr(admission_helper, "PREPROCESS_SAMPLE_RATE", 16000)
+    monkeypatch.setattr(admission_helper, "ADMISSION_BASE_BYTES", 0)
+    payload = 300 * 16000 * 2
+
+    # Ten minutes of 44.1 kHz stereo: two chunks, each held as a 16 kHz mono payload
+    info = WavInfo(1, 2, 44100, 16, 4, 44, 600 * 44100 * 4)
+    assert estimate_request_bytes(info.data_size + 44, info, in_memory=False) == 2 * payload
+
+    # An hour: twelve chunks, but only SARVAM_REQUEST_CONCURRENCY in flight
+    info = info._replace(data_size=3600 * 44100 * 4)
+    assert estimate_request_bytes(info.data_size + 44, info, in_memory=False) == 4 * payload
+
+    assert admission_helper.audio_pool_bytes() == 2 * 8 * 300 * admission_helper.DEFAULT_BYTE_RATE
@@ -0,0 +1,28 @@
+import logging
+from utils.logs import log_helper
+from utils.logs.log_helper import InfoRateLimitFilter
+
+
+def _info(name: str) -> logging.LogRecord:
+    return logging.LogRecord(name, logging.INFO, __file__, 1, "message", None, None)
+
+
+def test_rate_below_one_per_second_still_lets_records_through(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(log_helper.time, "monotonic", lambda: now[0])
+    rate_filter = InfoRateLimitFilter({"slow": 0.5}, 0)
+
+    assert rate_filter.filter(_info("slow"))
+    assert not rate_filter.filter(_info("slow"))
+
+    now[0] += 2.0  # One token at 0.5/s
+    record = _info("slow")
+    assert rate_filter.filter(record)
+    assert record.suppressed == 1
+    assert not rate_filter.filter(_info("slow"))
+
+
+def test_warnings_are_never_limited():
+    rate_filter = InfoRateLimitFilter({"slow": 0.5}, 0)
+    warning = logging.LogRecord("slow", logging.WARNING, __file__, 1, "message", None, None)
+    assert all(rate_filter.filter(warning) for _ in range(5))
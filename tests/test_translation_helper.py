@@ -0,0 +1,20 @@
+import asyncio
+from utils.sarvam import translation_helper
+
+
+def test_translate_batch_ignores_ids_that_were_not_sent(monkeypatch):
+    async def fake_batch(batch, source_lang):
+        reply = {idx: f"en:{text}" for idx, text in batch}
+        reply.update({"99": "invented", "x": "malformed"})
+        return reply
+
+    async def fake_single(text, source_lang):
+        raise AssertionError("every sent id was answered")
+
+    monkeypatch.setattr(translation_helper, "get_translation_cache", lambda: None)
+    monkeypatch.setattr(translation_helper, "_translate_one_batch", fake_batch)
+    monkeypatch.setattr(translation_helper, "_request_translation", fake_single)
+
+    result = asyncio.run(translation_helper.translate_batch(["namaste", "", "dhanyavaad"], "hi-IN"))
+
+    assert result == ["en:namaste", "", "en:dhanyavaad"]
@@ -0,0 +1,268 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from collections import deque
+from utils.configs.config import (
+    ADMISSION_MEMORY_BUDGET,
+    ADMISSION_MAX_WAITING,
+    ADMISSION_RETRY_AFTER,
+    ADMISSION_BASE_BYTES,
+    ADMISSION_DECODE_EXPANSION,
+    AUDIO_POOL_WORKERS,
+    CHUNK_DURATION,
+    PREPROCESS_AUDIO,
+    PREPROCESS_SAMPLE_RATE,
+    SARVAM_REQUEST_CONCURRENCY,
+)
+
+# 16-bit stereo at 44.1 kHz: what an MP3 usually decodes to, and the assumption for WAVs not yet parsed
+DEFAULT_BYTE_RATE = 44100 * 2 * 2
+
+# Bytes fetched from the start of an S3 object to read its WAV header before downloading it
+WAV_HEADER_PROBE_BYTES = 64 * 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted under the memory budget; retry_after is in seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_request_bytes(size: int, info=None, compressed: bool = False, in_memory: bool = True) -> int:
+    """
+    Peak memory a transcription of `size` input bytes is expected to hold:
+    the input itself when it is in memory (an S3 download; a spool is a
+    file-backed map and doesn't count), the decoded PCM of compressed input
+    (twice: built in the audio pool, then returned), and when preprocessing,
+    the 16-bit mono payloads of the chunks it has in flight (at most
+    SARVAM_REQUEST_CONCURRENCY), plus ADMISSION_BASE_BYTES. The raw chunk
+    copies in the audio pool are shared by all requests and charged once
+    (see audio_pool_bytes). info is the parsed WavInfo, if any.
+    """
+    held = size if in_memory else 0
+    decoded = 0
+    if info is not None:
+        pcm_size, byte_rate = info.data_size, info.sample_rate * info.block_align
+    elif compressed:
+        decoded = int(size * ADMISSION_DECODE_EXPANSION)
+        pcm_size, byte_rate = decoded, DEFAULT_BYTE_RATE
+    else:
+        pcm_size, byte_rate = size, DEFAULT_BYTE_RATE
+    payloads = 0
+    if PREPROCESS_AUDIO and pcm_size > 0:
+        num_chunks = math.ceil(pcm_size / max(int(CHUNK_DURATION * byte_rate), 1))
+        chunk_seconds = min(CHUNK_DURATION, pcm_size / byte_rate)
+        payloads = min(num_chunks, SARVAM_REQUEST_CONCURRENCY) * int(chunk_seconds * PREPROCESS_SAMPLE_RATE * 2)
+    return held + 2 * decoded + payloads + ADMISSION_BASE_BYTES
+
+
+def audio_pool_bytes() -> int:
+    """
+    Raw chunk copies the audio pool holds across all requests when
+    preprocessing: one per AUDIO_POOL_WORKERS slot, twice (the parent's
+    slice and the worker's copy), at DEFAULT_BYTE_RATE.
+    """
+    if not PREPROCESS_AUDIO:
+        return 0
+    return 2 * AUDIO_POOL_WORKERS * int(CHUNK_DURATION * DEFAULT_BYTE_RATE)
+
+
+class Reservation:
+    """Bytes held against the budget by one request until release()."""
+
+    def __init__(self, budget: "MemoryBudget", reservation_id: int, nbytes: int, label: str):
+        self._budget = budget
+        self.id = reservation_id
+        self.nbytes = nbytes
+        self.label = label
+        self.started = time.monotonic()
+        self.released = False
+
+    async def resize(self, nbytes: int, timeout: float = None, shed: bool = True):
+        """
+        Replaces the estimate once more is known (size, WAV header), before
+        the audio is loaded. Shrinking is immediate; growing past the free
+        budget waits like reserve() and raises AdmissionRejected the same way.
+        """
+        await self._budget._resize(self, nbytes, timeout, shed)
+
+    def release(self):
+        self._budget._release(self)
+
+
+class MemoryBudget:
+    """
+    Process-wide memory budget. reserve() admits a request at once if its
+    estimate fits and nobody is waiting; otherwise it queues (first come,
+    first served, so a large request is not starved by smaller ones) until
+    the bytes are released, or is shed with AdmissionRejected after its
+    timeout or when max_waiting requests already wait. A single request
+    larger than the whole budget is admitted alone.
+    """
+
+    def __init__(self, budget: int, max_waiting: int):
+        self.budget = budget
+        self.max_waiting = max_waiting
+        self.reserved = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._ids = itertools.count(1)
+        self._active = {}        # id -> Reservation
+        self._shared = {}        # label -> bytes held for the process lifetime (see hold)
+        self._waiters = deque()  # [nbytes, future, label, sheddable, reservation being resized or None]
+        self._hold_times = deque(maxlen=50)
+
+    def _clamp(self, nbytes: int) -> int:
+        nbytes = max(int(nbytes), 0)
+        return min(nbytes, self.budget) if self.budget > 0 else nbytes
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.budget <= 0 or self.reserved + nbytes <= self.budget
+
+    def _grant(self, nbytes: int, label: str) -> Reservation:
+        reservation = Reservation(self, next(self._ids), nbytes, label)
+        self.reserved += nbytes
+        self.admitted += 1
+        self._active[reservation.id] = reservation
+        return reservation
+
+    def _wake(self):
+        while self._waiters and self._fits(self._waiters[0][0]):
+            nbytes, future, label, _, reservation = self._waiters.popleft()
+            if future.done():
+                continue
+            if reservation is None:
+                reservation = self._grant(nbytes, label)
+            elif reservation.released:
+                future.set_result(reservation)
+                continue
+            else:
+                self.reserved += nbytes
+                reservation.nbytes = nbytes
+            future.set_result(reservation)
+
+    def hold(self, nbytes: int, label: str):
+        """Reserves memory shared by all requests (e.g. the audio pool) for as long as the process runs."""
+        nbytes = self._clamp(nbytes)
+        self.reserved += nbytes
+        self._shared[label] = self._shared.get(label, 0) + nbytes
+
+    def retry_after(self) -> int:
+        """Seconds to suggest in Retry-After: the typical time a reservation is held."""
+        if not self._hold_times:
+            return ADMISSION_RETRY_AFTER
+        return max(1, min(300, round(sum(self._hold_times) / len(self._hold_times))))
+
+    def _reject(self, message: str):
+        self.rejected += 1
+        logging.warning("Admission rejected: %s (%d of %d bytes reserved, %d waiting)", message, self.reserved, self.budget, len(self._waiters))
+        raise AdmissionRejected(message, self.retry_after())
+
+    async def reserve(self, nbytes: int, timeout: float = None, shed: bool = True, label: str = "") -> Reservation:
+        """
+        Reserves nbytes, waiting up to timeout seconds (None waits as long as
+        it takes). shed=False (background jobs) never counts towards
+        max_waiting and can only be turned away by its timeout.
+        """
+        nbytes = self._clamp(nbytes)
+        if not self._waiters and self._fits(nbytes):
+            return self._grant(nbytes, label)
+        return await self._wait(nbytes, timeout, shed, label)
+
+    async def _wait(self, nbytes: int, timeout: float, shed: bool, label: str, reservation: Reservation = None) -> Reservation:
+        """Queues for nbytes; a resized reservation is granted in place, anything else as a new one."""
+        if shed and sum(1 for waiter in self._waiters if waiter[3]) >= self.max_waiting:
+            self._reject(f"{len(self._waiters)} requests already waiting")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = [nbytes, future, label, shed, reservation]
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                return future.result()
+            self._waiters.remove(waiter)
+            self._wake()
+            self._reject(f"no room for {nbytes} bytes within {timeout:g} seconds")
+        except asyncio.CancelledError:
+            # The client went away while waiting; give back anything granted meanwhile
+            if future.done() and not future.cancelled():
+                future.result().release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._wake()
+            raise
+
+    async def _resize(self, reservation: Reservation, nbytes: int, timeout: float, shed: bool):
+        if reservation.released:
+            return
+        nbytes = self._clamp(nbytes)
+        if nbytes <= reservation.nbytes or (not self._waiters and self._fits(nbytes - reservation.nbytes)):
+            self.reserved += nbytes - reservation.nbytes
+            shrunk = nbytes < reservation.nbytes
+            reservation.nbytes = nbytes
+            if shrunk:
+                self._wake()
+            return
+        # Give the held bytes back and queue for the full size: requests holding
+        # part of the budget while waiting for more could otherwise wait on each
+        # other forever. Nothing is loaded yet, so nothing real is uncounted.
+        self.reserved -= reservation.nbytes
+        reservation.nbytes = 0
+        self._wake()
+        await self._wait(nbytes, timeout, shed, reservation.label, reservation)
+
+    def _release(self, reservation: Reservation):
+        if reservation.released:
+            return
+        reservation.released = True
+        self.reserved -= reservation.nbytes
+        self._active.pop(reservation.id, None)
+        self._hold_times.append(time.monotonic() - reservation.started)
+        self._wake()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "budget_bytes": self.budget,
+            "reserved_bytes": self.reserved,
+            "shared_bytes": dict(self._shared),
+            "available_bytes": max(self.budget - self.reserved, 0) if self.budget > 0 else None,
+            "utilization": round(self.reserved / self.budget, 4) if self.budget > 0 else 0.0,
+            "active": len(self._active),
+            "waiting": len(self._waiters),
+            "waiting_bytes": sum(waiter[0] for waiter in self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "retry_after_seconds": self.retry_after(),
+            "reservations": [
+                {"id": r.id, "label": r.label, "bytes": r.nbytes, "age_seconds": round(now - r.started, 1)}
+                for r in sorted(self._active.values(), key=lambda r: r.nbytes, reverse=True)
+            ],
+        }
+
+
+_memory_budget = None
+
+
+def get_memory_budget() -> MemoryBudget:
+    global _memory_budget
+    if _memory_budget is None:
+        _memory_budget = MemoryBudget(ADMISSION_MEMORY_BUDGET, ADMISSION_MAX_WAITING)
+        pool_bytes = audio_pool_bytes()
+        if ADMISSION_MEMORY_BUDGET > 0 and pool_bytes:
+            if pool_bytes > ADMISSION_MEMORY_BUDGET // 2:
+                # Leave room for requests; the pool's share is then only partly accounted for
+                logging.warning("Audio pool needs %d of the %d byte admission budget; charging half", pool_bytes, ADMISSION_MEMORY_BUDGET)
+                pool_bytes = ADMISSION_MEMORY_BUDGET // 2
+            _memory_budget.hold(pool_bytes, "audio-pool")
+    return _memory_budget
+
+
+def get_admission_stats():
+    return _memory_budget.stats() if _memory_budget is not None else None
@@ -0,0 +1,173 @@
+import bisect
+import logging
+import numpy as np
+from utils.audio.wav_helper import WavInfo, WAVE_FORMAT_IEEE_FLOAT, MemoryReader, build_wav_header, pcm_slice
+from utils.sarvam.segment_helper import SegmentTable
+
+
+def _sample_dtype(info: WavInfo):
+    """NumPy dtype for one sample, or None for layouts the energy scan doesn't handle (e.g. 24-bit)."""
+    if info.audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        return {32: np.float32, 64: np.float64}.get(info.bits_per_sample)
+    return {8: np.uint8, 16: np.int16, 32: np.int32}.get(info.bits_per_sample)
+
+
+def frame_rms(audio_data, info: WavInfo, start_frame: int, end_frame: int, window_frames: int):
+    """
+    RMS energy of consecutive windows of window_frames over [start_frame, end_frame),
+    computed on the first channel only. Returns None if the sample format is unsupported.
+    """
+    dtype = _sample_dtype(info)
+    if dtype is None:
+        return None
+    start = info.data_offset + start_frame * info.block_align
+    end = info.data_offset + end_frame * info.block_align
+    samples = np.frombuffer(memoryview(audio_data)[start:end], dtype=dtype).reshape(-1, info.channels)[:, 0]
+    samples = samples.astype(np.float32)
+    if dtype is np.uint8:
+        samples -= 128.0
+    usable = len(samples) - len(samples) % window_frames
+    if usable == 0:
+        return None
+    windows = samples[:usable].reshape(-1, window_frames)
+    return np.sqrt(np.mean(windows * windows, axis=1))
+
+
+def find_quiet_frame(audio_data, info: WavInfo, lo: int, hi: int, window_frames: int) -> int:
+    """
+    Returns the middle of the quietest window in [lo, hi), so a split lands in
+    a pause instead of mid-word. Ties go to the latest window to keep chunks long.
+    """
+    energy = frame_rms(audio_data, info, lo, hi, window_frames)
+    if energy is None or len(energy) == 0:
+        return hi
+    best = len(energy) - 1 - int(np.argmin(energy[::-1]))
+    return lo + best * window_frames + window_frames // 2
+
+
+def plan_chunks(audio_data, info: WavInfo, chunk_seconds: float, overlap_seconds: float, search_seconds: float, window_ms: int) -> list:
+    """
+    Plans chunk boundaries for PCM audio. Each split is pulled back to the
+    quietest point in the search_seconds before the nominal boundary, and every
+    chunk after the first starts overlap_seconds before its split so words cut
+    at the boundary are heard whole by one of the chunks. No chunk, overlap
+    included, is longer than chunk_seconds.
+
+    Returns dicts with the chunk's frame range, its offset in seconds (used to
+    re-base timestamps) and split_time, the point where the previous chunk's
+    ownership of the timeline ends.
+    """
+    sample_rate = info.sample_rate
+    chunk_frames = int(chunk_seconds * sample_rate)
+    window_frames = max(1, int(window_ms * sample_rate / 1000))
+    overlap_frames = min(int(overlap_seconds * sample_rate), chunk_frames // 4)
+    search_frames = min(int(search_seconds * sample_rate), chunk_frames // 2)
+
+    splits = [0]
+    while True:
+        limit = chunk_frames - (overlap_frames if len(splits) > 1 else 0)
+        if info.num_frames - splits[-1] <= limit:
+            break
+        target = splits[-1] + limit
+        splits.append(find_quiet_frame(audio_data, info, target - search_frames, target, window_frames))
+    splits.append(info.num_frames)
+
+    plan = []
+    for i in range(len(splits) - 1):
+        start_frame = splits[i] if i == 0 else max(0, splits[i] - overlap_frames)
+        plan.append({
+            "index": i,
+            "start_frame": start_frame,
+            "end_frame": splits[i + 1],
+            "offset": start_frame / sample_rate,
+            "split_time": splits[i] / sample_rate,
+            "end_time": splits[i + 1] / sample_rate,
+        })
+    logging.info("Planned %d chunks at splits %s", len(plan), [round(s / sample_rate, 2) for s in splits[1:-1]])
+    return plan
+
+
+def chunk_frame_ranges(chunk: dict) -> list:
+    """Frame ranges sent for a chunk: its packed speech regions, or its whole span."""
+    return chunk.get("regions") or [(chunk["start_frame"], chunk["end_frame"])]
+
+
+def build_chunk_readers(audio_data, info: WavInfo, plan: list) -> list:
+    """Zero-copy WAV readers for every planned chunk; packed regions are joined back to back."""
+    readers = []
+    for chunk in plan:
+        slices = [pcm_slice(audio_data, info, start, end) for start, end in chunk_frame_ranges(chunk)]
+        readers.append(MemoryReader([build_wav_header(info, sum(len(s) for s in slices))] + slices))
+    return readers
+
+
+def map_packed_time(t: float, offset_map: list) -> float:
+    """Maps a time within a packed (VAD) chunk back to the original recording's timeline."""
+    index = max(0, bisect.bisect_right([entry["packed"] for entry in offset_map], t) - 1)
+    entry = offset_map[index]
+    return entry["original"] + min(max(t - entry["packed"], 0.0), entry["duration"])
+
+
+def dedupe_overlap_words(previous_text: str, text: str, max_words: int = 30) -> str:
+    """
+    Drops the leading words of text that repeat the trailing words of
+    previous_text (the part both chunks heard in the overlap).
+    """
+    if not previous_text or not text:
+        return text
+    prev_words = previous_text.split()
+    words = text.split()
+    for k in range(min(max_words, len(prev_words), len(words)), 0, -1):
+        if prev_words[-k:] == words[:k]:
+            return " ".join(words[k:])
+    return text
+
+
+def rebase_segments(segments: SegmentTable, chunk: dict, previous_transcript: str = None, out: SegmentTable = None, trimmed: list = None) -> SegmentTable:
+    """
+    Shifts a chunk's segment timestamps by its offset into absolute file time
+    and drops what the previous chunk already covered: segments that end
+    before the split, and repeated words (of previous_transcript, the last
+    kept segment) in a segment straddling it. Appends to out if given, so the
+    merge builds one table without per-chunk copies. A trimmed segment's
+    translation still covers the dropped words, so it is cleared and the
+    segment's index appended to trimmed for re-translation.
+    """
+    rebased = out if out is not None else SegmentTable()
+    offset = chunk["offset"]
+    offset_map = chunk.get("offset_map")
+    split_time = chunk["split_time"]
+    for i in range(len(segments)):
+        start_time, end_time = segments.start_time(i), segments.end_time(i)
+        transcript = segments.transcripts[i]
+        translation = segments.translations[i]
+        if offset_map:
+            # Packed speech regions don't overlap; only the silence removed between them needs undoing
+            if start_time is not None:
+                start_time = round(map_packed_time(start_time, offset_map), 3)
+            if end_time is not None:
+                end_time = round(map_packed_time(end_time, offset_map), 3)
+            rebased.append(start_time, end_time, segments.speaker_label(i), transcript, segments.translations[i])
+            continue
+
+        if start_time is not None:
+            start_time = round(start_time + offset, 3)
+        if end_time is not None:
+            end_time = round(end_time + offset, 3)
+
+        if chunk["index"] > 0 and end_time is not None and end_time <= split_time:
+            continue  # Entirely inside the overlap; the previous chunk owns it
+
+        if chunk["index"] > 0 and start_time is not None and start_time < split_time:
+            if previous_transcript is not None:
+                transcript = dedupe_overlap_words(previous_transcript, transcript)
+            start_time = round(split_time, 3)
+            if not transcript:
+                continue
+            if transcript != segments.transcripts[i] and translation:
+                translation = ""
+                if trimmed is not None:
+                    trimmed.append(len(rebased))
+
+        rebased.append(start_time, end_time, segments.speaker_label(i), transcript, translation)
+    return rebased
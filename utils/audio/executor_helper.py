@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils.configs.config import AUDIO_POOL_WORKERS, AUDIO_POOL_START_METHOD, AUDIO_POOL_MAX_QUEUE
+
+# CPU-bound audio work (pydub/ffmpeg decode, resampling) runs here so it never blocks the event loop
+_audio_executor = None
+_executor_lock = threading.Lock()  # Guards replacing _audio_executor after a worker crash
+_queue_slots = None
+
+# Pool statistics, read by get_audio_pool_stats()
+_stats = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+_recent_latencies = deque(maxlen=200)  # (wait seconds, run seconds) of recent tasks
+
+
+def _warm_worker():
+    """Imports the heavy audio modules so the first real task doesn't pay for them."""
+    import numpy  # noqa: F401
+    import pydub  # noqa: F401
+    return multiprocessing.current_process().pid
+
+
+def get_audio_executor() -> ProcessPoolExecutor:
+    global _audio_executor
+    with _executor_lock:
+        if _audio_executor is None:
+            _audio_executor = ProcessPoolExecutor(
+                max_workers=AUDIO_POOL_WORKERS,
+                mp_context=multiprocessing.get_context(AUDIO_POOL_START_METHOD)
+            )
+            logging.info("Started audio process pool with %d workers", AUDIO_POOL_WORKERS)
+        return _audio_executor
+
+
+def _get_queue_slots() -> asyncio.Semaphore:
+    global _queue_slots
+    if _queue_slots is None:
+        _queue_slots = asyncio.Semaphore(AUDIO_POOL_WORKERS + AUDIO_POOL_MAX_QUEUE)
+    return _queue_slots
+
+
+async def warm_audio_pool():
+    """Starts every worker process up front. Called from the FastAPI startup hook."""
+    loop = asyncio.get_running_loop()
+    executor = get_audio_executor()
+    try:
+        pids = await asyncio.gather(*(loop.run_in_executor(executor, _warm_worker) for _ in range(AUDIO_POOL_WORKERS)))
+        logging.info("Warmed audio process pool: %d worker processes", len(set(pids)))
+    except Exception as e:
+        logging.error("Failed to warm audio process pool: %s", str(e))
+
+
+async def run_in_audio_pool(fn, *args):
+    """
+    Runs a picklable function in the audio process pool and awaits its result.
+    At most AUDIO_POOL_MAX_QUEUE tasks wait behind the running ones; further
+    callers wait here, on the event loop, instead of piling arguments into the pool.
+    """
+    submitted = time.monotonic()
+    _stats["queued"] += 1
+    async with _get_queue_slots():
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        _stats["queued"] -= 1
+        _stats["running"] += 1
+        executor = get_audio_executor()
+        try:
+            result = await loop.run_in_executor(executor, fn, *args)
+            _stats["completed"] += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (OOM, ffmpeg crash); start a fresh pool for the next task
+            _stats["failed"] += 1
+            _reset_audio_executor(executor)
+            raise
+        except Exception:
+            _stats["failed"] += 1
+            raise
+        finally:
+            _stats["running"] -= 1
+            _recent_latencies.append((started - submitted, time.monotonic() - started))
+
+
+def get_audio_pool_stats() -> dict:
+    """Queue depth and recent task latency, for sizing AUDIO_POOL_WORKERS per core count."""
+    waits = [wait for wait, _ in _recent_latencies]
+    runs = [run for _, run in _recent_latencies]
+    return {
+        "workers": AUDIO_POOL_WORKERS,
+        "max_queue": AUDIO_POOL_MAX_QUEUE,
+        "waiting": _stats["queued"],
+        "in_pool": _stats["running"],
+        "completed": _stats["completed"],
+        "failed": _stats["failed"],
+        "avg_wait_seconds": sum(waits) / len(waits) if waits else 0.0,
+        "avg_task_seconds": sum(runs) / len(runs) if runs else 0.0,
+        "max_task_seconds": max(runs) if runs else 0.0
+    }
+
+
+def _reset_audio_executor(broken: ProcessPoolExecutor):
+    """
+    Drops the broken pool so the next task starts a fresh one. Only if it is
+    still the current pool: a late failure from an old pool must not shut
+    down its healthy replacement.
+    """
+    global _audio_executor
+    with _executor_lock:
+        if _audio_executor is not broken:
+            return
+        _audio_executor = None
+    logging.error("Audio process pool is broken; restarting it")
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_audio_executor():
+    global _audio_executor
+    with _executor_lock:
+        executor, _audio_executor = _audio_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,129 @@
+import io
+import logging
+import math
+import subprocess
+import numpy as np
+from utils.audio.wav_helper import WavInfo, WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT, build_wav_header
+
+# Upload file name and MIME type per payload format
+AUDIO_FORMATS = {
+    "wav": ("audio.wav", "audio/wav"),
+    "flac": ("audio.flac", "audio/flac"),
+    "mp3": ("audio.mp3", "audio/mpeg"),
+}
+
+
+def detect_audio_format(audio_data) -> str:
+    """Payload format of an upload from its leading bytes ("wav", "flac" or "mp3"), or None if unknown."""
+    head = bytes(memoryview(audio_data)[:4])
+    if head == b"RIFF":
+        return "wav"
+    if head == b"fLaC":
+        return "flac"
+    if head[:3] == b"ID3" or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):  # ID3 tag or MPEG frame sync
+        return "mp3"
+    return None
+
+
+def to_float_mono(pcm: bytes, info: WavInfo) -> np.ndarray:
+    """Decodes interleaved PCM into a float32 mono signal in [-1, 1] by averaging channels."""
+    if info.audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        samples = np.frombuffer(pcm, dtype=np.float32 if info.bits_per_sample == 32 else np.float64).astype(np.float32)
+    elif info.bits_per_sample == 8:
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif info.bits_per_sample == 16:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    elif info.bits_per_sample == 24:
+        raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = (np.where(ints & 0x800000, ints - 0x1000000, ints)).astype(np.float32) / 8388608.0
+    elif info.bits_per_sample == 32:
+        samples = np.frombuffer(pcm, dtype=np.int32).astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported sample width: {info.bits_per_sample} bits")
+    if info.channels > 1:
+        samples = samples.reshape(-1, info.channels).mean(axis=1)
+    return samples
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Downsamples by the rational factor target_rate / source_rate with a
+    polyphase Kaiser-windowed sinc low-pass (the same design as
+    scipy.signal.resample_poly), cut off at the target Nyquist so nothing
+    above it aliases into the speech band. Never upsamples: a source at or
+    below target_rate is returned unchanged.
+    """
+    if source_rate <= target_rate or len(samples) == 0:
+        return samples
+    divisor = math.gcd(source_rate, target_rate)
+    up, down = target_rate // divisor, source_rate // divisor
+
+    # Low-pass at the upsampled rate, 10 zero crossings either side, gain `up` for the zero-stuffing
+    half_len = 10 * down
+    taps = np.arange(-half_len, half_len + 1)
+    fir = np.sinc(taps / down) * np.kaiser(len(taps), 5.0) * (up / down)
+    # Polyphase split: phases[p] holds taps p, p + up, p + 2 * up, ... reversed, to dot with input windows
+    taps_per_phase = -(-len(fir) // up)
+    phases = np.zeros(taps_per_phase * up)
+    phases[:len(fir)] = fir
+    phases = phases.reshape(taps_per_phase, up).T[:, ::-1].astype(np.float32)
+
+    # Output n sits at n * down + half_len on the upsampled grid (the filter is centred, so no delay).
+    # Outputs n, n + up, n + 2 * up, ... share a phase and step `down` input samples apart, so each
+    # phase is one matrix-vector product over a strided view of the input instead of a copy per tap.
+    out = np.empty(-(-len(samples) * up // down), np.float32)
+    padded = np.concatenate((np.zeros(taps_per_phase, np.float32), samples.astype(np.float32), np.zeros(taps_per_phase, np.float32)))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, taps_per_phase)
+    for first in range(min(up, len(out))):
+        newest, phase = divmod(first * down + half_len, up)
+        # Window i ends at input sample newest + i * down (shifted by the leading padding)
+        out[first::up] = windows[newest + 1::down][:len(out[first::up])] @ phases[phase]
+    return out
+
+
+def encode(wav_bytes: bytes, audio_format: str) -> bytes:
+    """Encodes a WAV payload with ffmpeg; "wav" returns it unchanged."""
+    if audio_format == "wav":
+        return wav_bytes
+    completed = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "wav", "-i", "pipe:0", "-f", audio_format, "pipe:1"],
+        input=wav_bytes, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    return completed.stdout
+
+
+def preprocess_chunk(pcm: bytes, info: WavInfo, target_rate: int, audio_format: str):
+    """
+    Downmixes a PCM slice to mono, downsamples it to target_rate (audio
+    already at or below it keeps its rate) as 16-bit PCM and optionally
+    encodes it. Runs in the audio process pool. Returns (payload,
+    audio_format); falls back to WAV if encoding fails.
+    """
+    rate = min(info.sample_rate, target_rate)
+    samples = resample(to_float_mono(pcm, info), info.sample_rate, rate)
+    data = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+    out_info = WavInfo(WAVE_FORMAT_PCM, 1, rate, 16, 2, 44, len(data))
+    wav_bytes = build_wav_header(out_info, len(data)) + data
+    try:
+        return encode(wav_bytes, audio_format), audio_format
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.error("Encoding chunk as %s failed, sending WAV: %s", audio_format, str(e))
+        return wav_bytes, "wav"
+
+
+def decode_audio(audio_bytes: bytes):
+    """
+    Decodes a compressed recording (MP3, compressed WAV, ...) with pydub/ffmpeg.
+    Runs in the audio process pool. Returns (raw PCM bytes, WavInfo).
+    """
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+    raw_data = audio.raw_data
+    return raw_data, WavInfo(WAVE_FORMAT_PCM, audio.channels, audio.frame_rate, audio.sample_width * 8, audio.frame_width, 0, len(raw_data))
+
+
+def needs_preprocessing(info: WavInfo, target_rate: int, audio_format: str) -> bool:
+    """Skips audio that is already mono 16-bit at or below the target rate and stays WAV."""
+    return not (info.channels == 1 and info.sample_rate <= target_rate and info.bits_per_sample == 16
+                and info.audio_format == WAVE_FORMAT_PCM and audio_format == "wav")
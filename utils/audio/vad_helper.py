@@ -0,0 +1,132 @@
+import logging
+import numpy as np
+from utils.audio.wav_helper import WavInfo
+from utils.audio.transcode_helper import to_float_mono
+from utils.audio.chunk_helper import find_quiet_frame
+
+# Audio is scanned in blocks of this many seconds so a long recording is never converted to float in one piece
+SCAN_BLOCK_SECONDS = 60
+
+
+def frame_features(audio_data, info: WavInfo, window_frames: int):
+    """
+    Per-window energy (dBFS) and zero-crossing rate of the mono-mixed signal.
+    The trailing partial window is ignored.
+    """
+    block_frames = max(window_frames, (SCAN_BLOCK_SECONDS * info.sample_rate) // window_frames * window_frames)
+    usable_frames = info.num_frames - info.num_frames % window_frames
+    energy, zcr = [], []
+    view = memoryview(audio_data)
+    for start in range(0, usable_frames, block_frames):
+        end = min(start + block_frames, usable_frames)
+        pcm = view[info.data_offset + start * info.block_align:info.data_offset + end * info.block_align]
+        windows = to_float_mono(pcm, info).reshape(-1, window_frames)
+        rms = np.sqrt(np.mean(windows * windows, axis=1))
+        energy.append(20 * np.log10(rms + 1e-10))
+        zcr.append(np.mean(np.signbit(windows[:, 1:]) != np.signbit(windows[:, :-1]), axis=1))
+    if not energy:
+        return np.zeros(0), np.zeros(0)
+    return np.concatenate(energy), np.concatenate(zcr)
+
+
+def detect_speech(audio_data, info: WavInfo, window_ms: int, energy_margin_db: float, min_energy_db: float,
+                  zcr_threshold: float, min_speech_ms: int, min_silence_ms: int, padding_ms: int) -> list:
+    """
+    Energy/zero-crossing voice activity detection. A window is speech when its
+    energy is energy_margin_db above the recording's noise floor (voiced
+    sounds), or slightly lower with a high zero-crossing rate (fricatives).
+    Pauses shorter than min_silence_ms are bridged, blips shorter than
+    min_speech_ms dropped, and each region padded by padding_ms.
+
+    Returns [(start_frame, end_frame), ...] in file order.
+    """
+    window_frames = max(1, int(window_ms * info.sample_rate / 1000))
+    energy, zcr = frame_features(audio_data, info, window_frames)
+    if len(energy) == 0:
+        return []
+
+    noise_floor = float(np.percentile(energy, 10))
+    threshold = max(noise_floor + energy_margin_db, min_energy_db)
+    voiced = energy > threshold
+    unvoiced = (energy > threshold - energy_margin_db / 2) & (zcr > zcr_threshold)
+    active = voiced | unvoiced
+
+    # Rising/falling edges of the activity mask give the raw regions in window units
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    raw = list(zip(edges[::2], edges[1::2]))
+
+    min_silence_windows = int(np.ceil(min_silence_ms / window_ms))
+    min_speech_windows = int(np.ceil(min_speech_ms / window_ms))
+    regions = []
+    for start, end in raw:
+        if regions and start - regions[-1][1] < min_silence_windows:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    regions = [(start, end) for start, end in regions if end - start >= min_speech_windows]
+
+    padding = int(padding_ms * info.sample_rate / 1000)
+    padded = []
+    for start, end in regions:
+        start_frame = max(0, int(start) * window_frames - padding)
+        end_frame = min(info.num_frames, int(end) * window_frames + padding)
+        if padded and start_frame <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end_frame)
+        else:
+            padded.append((start_frame, end_frame))
+
+    logging.info(
+        "VAD: noise floor %.1f dBFS, threshold %.1f dBFS, %d speech regions",
+        noise_floor, threshold, len(padded)
+    )
+    return padded
+
+
+def pack_speech_regions(audio_data, info: WavInfo, regions: list, chunk_seconds: float, window_ms: int) -> list:
+    """
+    Packs speech regions back to back into chunks of at most chunk_seconds.
+    A region longer than a chunk is split at its quietest point near the limit.
+
+    Returns chunk plans like plan_chunks, plus the regions' frame ranges and an
+    offset_map of {"packed", "original", "duration"} entries (seconds) that
+    maps a time in the packed chunk back to the original recording.
+    """
+    sample_rate = info.sample_rate
+    chunk_frames = int(chunk_seconds * sample_rate)
+    window_frames = max(1, int(window_ms * sample_rate / 1000))
+    search_frames = chunk_frames // 10
+
+    pieces = []
+    for start, end in regions:
+        while end - start > chunk_frames:
+            split = find_quiet_frame(audio_data, info, start + chunk_frames - search_frames, start + chunk_frames, window_frames)
+            pieces.append((start, split))
+            start = split
+        pieces.append((start, end))
+
+    grouped = []
+    for piece in pieces:
+        if grouped and sum(e - s for s, e in grouped[-1]) + piece[1] - piece[0] <= chunk_frames:
+            grouped[-1].append(piece)
+        else:
+            grouped.append([piece])
+
+    plan = []
+    for index, group in enumerate(grouped):
+        offset_map = []
+        packed = 0
+        for start, end in group:
+            offset_map.append({"packed": packed / sample_rate, "original": start / sample_rate, "duration": (end - start) / sample_rate})
+            packed += end - start
+        plan.append({
+            "index": index,
+            "start_frame": group[0][0],
+            "end_frame": group[-1][1],
+            "regions": group,
+            "offset_map": offset_map,
+            "offset": group[0][0] / sample_rate,
+            "split_time": group[0][0] / sample_rate,
+            "end_time": group[-1][1] / sample_rate,
+        })
+    return plan
+
@@ -0,0 +1,135 @@
+import io
+import struct
+from typing import NamedTuple
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavInfo(NamedTuple):
+    audio_format: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    block_align: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def num_frames(self) -> int:
+        return self.data_size // self.block_align
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.sample_rate
+
+
+def parse_wav_header(audio_data):
+    """
+    Walks the RIFF chunks of a WAV buffer and returns a WavInfo for PCM or
+    IEEE-float audio, or None when the buffer is anything else (MP3,
+    compressed WAV, truncated header) and needs the pydub fallback.
+    """
+    view = memoryview(audio_data)
+    if len(view) < 12 or bytes(view[0:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+        return None
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(view):
+        chunk_id = bytes(view[pos:pos + 4])
+        chunk_size = struct.unpack_from("<I", view, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            audio_format, channels, sample_rate, _, block_align, bits = struct.unpack_from("<HHIIHH", view, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format tag is the first two bytes of the SubFormat GUID
+                audio_format = struct.unpack_from("<H", view, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, bits, block_align)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, sample_rate, bits, block_align = fmt
+            if audio_format not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT) or not block_align or not sample_rate:
+                return None
+            # Streamed recorders often leave the size at 0 or 0xFFFFFFFF; trust the buffer instead
+            data_size = len(view) - body if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, len(view) - body)
+            data_size -= data_size % block_align
+            return WavInfo(audio_format, channels, sample_rate, bits, block_align, body, data_size)
+        pos = body + chunk_size + (chunk_size & 1)  # Chunks are word aligned
+    return None
+
+
+def build_wav_header(info: WavInfo, data_size: int) -> bytes:
+    """Canonical 44-byte header for a slice of data_size bytes in info's format."""
+    byte_rate = info.sample_rate * info.block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, info.audio_format, info.channels, info.sample_rate,
+        byte_rate, info.block_align, info.bits_per_sample,
+        b"data", data_size
+    )
+
+
+class MemoryReader(io.RawIOBase):
+    """
+    Read-only file object over a list of buffers (e.g. a synthesized header
+    and a memoryview of the original audio). httpx streams it into the
+    multipart body without first concatenating the buffers into one copy.
+    """
+
+    def __init__(self, buffers):
+        self._buffers = [memoryview(b).cast("B") for b in buffers]
+        self._size = sum(len(b) for b in self._buffers)
+        self._pos = 0
+
+    def __len__(self):
+        return self._size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        return self._pos
+
+    def readinto(self, target):
+        target = memoryview(target).cast("B")
+        written = 0
+        pos = self._pos
+        for buf in self._buffers:
+            if pos >= len(buf):
+                pos -= len(buf)
+                continue
+            n = min(len(buf) - pos, len(target) - written)
+            target[written:written + n] = buf[pos:pos + n]
+            written += n
+            pos = 0
+            if written == len(target):
+                break
+        self._pos += written
+        return written
+
+    def close(self):
+        self._buffers = []
+        super().close()
+
+
+def pcm_slice(audio_data, info: WavInfo, start_frame: int, end_frame: int) -> memoryview:
+    """Zero-copy view of the raw samples for frames [start_frame, end_frame)."""
+    start = info.data_offset + start_frame * info.block_align
+    end = info.data_offset + end_frame * info.block_align
+    return memoryview(audio_data)[start:end]
+
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import uuid
+import multiprocessing
+import httpx
+from fastapi import FastAPI, UploadFile, File, Form, Request
+from fastapi.responses import JSONResponse, FileResponse
+from utils.audio.wav_helper import parse_wav_header
+
+# Seconds of audio per fake diarized utterance
+UTTERANCE_SECONDS = 10
+
+
+def build_fake_sarvam_app(latency: float, latency_per_audio_second: float, error_rate: float, throttle_rate: float, files_dir: str) -> FastAPI:
+    """
+    Stand-in for Sarvam speech-to-text. Answers after latency plus
+    latency_per_audio_second for every second of audio received, fails with
+    503/429 at the given rates, and returns one utterance per UTTERANCE_SECONDS.
+    Also serves files_dir under /files/ as the source for URL ingestion.
+    """
+    app = FastAPI()
+
+    @app.post("/speech-to-text")
+    async def speech_to_text(file: UploadFile = File(...), model: str = Form(None)):
+        body = await file.read()
+        info = parse_wav_header(body)
+        duration = info.duration if info is not None else len(body) / 32000
+        await asyncio.sleep(latency + latency_per_audio_second * duration)
+
+        roll = random.random()
+        if roll < error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        if roll < error_rate + throttle_rate:
+            return JSONResponse({"error": "injected throttle"}, status_code=429)
+
+        entries = []
+        start = 0.0
+        while start < duration:
+            end = min(start + UTTERANCE_SECONDS, duration)
+            entries.append({
+                "transcript": f"ನಮಸ್ಕಾರ utterance {len(entries)} from {start:.1f} to {end:.1f}",
+                "start_time_seconds": round(start, 3),
+                "end_time_seconds": round(end, 3),
+                "speaker_id": str(len(entries) % 2)
+            })
+            start = end
+        return {
+            "request_id": str(uuid.uuid4()),
+            "transcript": " ".join(entry["transcript"] for entry in entries),
+            "language_code": "kn-IN",
+            "diarized_transcript": {"entries": entries}
+        }
+
+    @app.get("/files/{name}")
+    async def serve_file(name: str):
+        return FileResponse(os.path.join(files_dir, os.path.basename(name)), media_type="audio/wav")
+
+    return app
+
+
+def build_fake_openai_app(latency: float) -> FastAPI:
+    """Stand-in for chat completions: "translates" by prefixing, honouring the batched JSON format."""
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency)
+        text = body["messages"][-1]["content"]
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            utterances = json.loads(text).get("utterances", {})
+            content = json.dumps({"translations": {key: f"EN: {value}" for key, value in utterances.items()}}, ensure_ascii=False)
+        else:
+            content = f"EN: {text}"
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "bench"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(text) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(text) + len(content)) // 4}
+        }
+
+    return app
+
+
+def _serve(kind: str, port: int, options: dict):
+    import uvicorn
+    if kind == "sarvam":
+        app = build_fake_sarvam_app(**options)
+    elif kind == "openai":
+        app = build_fake_openai_app(**options)
+    else:
+        from moto.server import ThreadedMotoServer
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # One access log line per S3 part otherwise
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+        server.start()
+        while True:
+            time.sleep(3600)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_service(kind: str, port: int, **options) -> multiprocessing.Process:
+    """
+    Starts a fake service ("sarvam", "openai" or "s3", the latter a moto
+    server) in its own process, so its memory doesn't count towards the
+    benchmarked process's RSS, and waits until it accepts connections.
+    """
+    process = multiprocessing.get_context("spawn").Process(target=_serve, args=(kind, port, options), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Fake {kind} service did not start on port {port}")
@@ -0,0 +1,131 @@
+"""
+Startup-time benchmark: how long importing the API and the Celery worker takes,
+and which modules that time goes to.
+
+Each target is imported in a fresh interpreter under `python -X importtime`
+(best of --runs), so nothing is shared with this process's module cache:
+
+    python -m utils.bench.import_time
+    python -m utils.bench.import_time --targets app --top 30 --output imports.json
+
+Reports the total per target, the slowest modules by self time, cumulative
+time per top-level package, and which of the DEFERRED modules the import
+pulled in anyway; those should only load on first use (first translation,
+first S3/Mongo call, first upload). The exit status is 1 if any did.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# The Celery modules import each other as top-level modules (see worker.py)
+CELERY_DIR = os.path.join(REPO_ROOT, "utils", "celery")
+
+DEFAULT_TARGETS = ("app", "utils.sarvam.sarvam_helper", "celery_app")
+DEFERRED = ("openai", "pydub", "werkzeug", "parameters", "boto3", "pymongo")
+
+
+def run_import(module: str) -> tuple:
+    """Imports module in a fresh interpreter; returns (-X importtime stderr, modules it loaded)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, CELERY_DIR, env.get("PYTHONPATH")]))
+    code = f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        tail = [line for line in completed.stderr.splitlines() if not line.startswith("import time:")][-5:]
+        raise RuntimeError(f"import {module} failed:\n" + "\n".join(tail))
+    return completed.stderr, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str) -> list:
+    """Parses -X importtime lines into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def summarize(module: str, rows: list, loaded: list, top: int) -> dict:
+    # The target is the last row logged at the shallowest depth it appears at
+    target = next((row for row in reversed(rows) if row[0] == module), None)
+    packages = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return {
+        "target": module,
+        "total_ms": round((target[2] if target else sum(row[1] for row in rows)) / 1000, 1),
+        "modules_imported": len(rows),
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+            for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+        ],
+        "packages": [
+            {"package": package, "ms": round(us / 1000, 1)}
+            for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "deferred_loaded": [name for name in DEFERRED if name in loaded]
+    }
+
+
+def measure(module: str, runs: int, top: int) -> dict:
+    """Best of `runs` cold imports; the first run also warms the OS file cache."""
+    best = None
+    for _ in range(runs):
+        stderr, loaded = run_import(module)
+        summary = summarize(module, parse_importtime(stderr), loaded, top)
+        if best is None or summary["total_ms"] < best["total_ms"]:
+            best = summary
+    return best
+
+
+def print_summary(summary: dict):
+    print(f"{summary['target']}: {summary['total_ms']} ms, {summary['modules_imported']} modules")
+    print("  slowest modules (self ms / cumulative ms):")
+    for row in summary["slowest_modules"]:
+        print(f"    {row['self_ms']:>8} {row['cumulative_ms']:>9}  {row['module']}")
+    print("  per package (ms):")
+    for row in summary["packages"]:
+        print(f"    {row['ms']:>8}  {row['package']}")
+    if summary["deferred_loaded"]:
+        print(f"  loaded at import but should be deferred: {', '.join(summary['deferred_loaded'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the API and worker entry points")
+    parser.add_argument("--targets", default=",".join(DEFAULT_TARGETS), help="Comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="Cold imports per target; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--output", help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    report = []
+    for module in [t for t in args.targets.split(",") if t]:
+        try:
+            summary = measure(module, args.runs, args.top)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            report.append({"target": module, "error": str(e)})
+            continue
+        print_summary(summary)
+        report.append(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote report to {args.output}")
+    if any(entry.get("deferred_loaded") or entry.get("error") for entry in report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
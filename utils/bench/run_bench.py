@@ -0,0 +1,252 @@
+"""
+Offline throughput benchmark for the transcription pipeline.
+
+Runs against local stand-ins only (fake Sarvam and chat-completions servers,
+a moto S3 server) with synthetic WAVs, so it needs no credentials or network.
+Needs `pip install "moto[server]"` on top of req.txt:
+
+    python -m utils.bench.run_bench --durations 60,600,3600,7200 --requests 4 --concurrency 2
+
+Scenarios:
+    endpoint  POST /sarvam/transcribe (file upload) through the ASGI app
+    engine    transcribe_with_sarvam on a memory-mapped file
+    s3        get_audio_for_transcription on an object already in S3
+    celery    the in-process Celery path (async_pipeline.transcribe_url) on a URL
+
+Reports requests/sec, p50/p99 latency, audio-seconds/sec, peak RSS of this
+process and per-stage time from the Prometheus stage histograms.
+"""
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import types
+import numpy as np
+from utils.bench.synthetic_audio import write_synthetic_wav
+from utils.bench.fake_services import start_service
+
+SCENARIOS = ("endpoint", "engine", "s3", "celery")
+STAGES = ("ingest", "s3_put", "s3_get", "decode", "chunking", "sarvam", "translation", "merge")
+BENCH_BUCKET = "sarvam-bench"
+
+
+def install_bench_parameters(s3_endpoint: str):
+    """
+    Points the app's `parameters` module at the moto server, with no Mongo, so
+    a benchmark run can never touch production storage.
+    """
+    import boto3
+    module = types.ModuleType("parameters")
+    module.s3_client = boto3.client(
+        "s3", endpoint_url=s3_endpoint, region_name="us-east-1",
+        aws_access_key_id="bench", aws_secret_access_key="bench"
+    )
+    module.AWS_BUCKET_NAME = BENCH_BUCKET
+    module.transcripts_collection = None
+    module.task_tracker = None
+    module.append_log_to_db = lambda *args, **kwargs: None
+    module.s3_client.create_bucket(Bucket=BENCH_BUCKET)
+    sys.modules["parameters"] = module
+    return module
+
+
+def stage_snapshot() -> dict:
+    from prometheus_client import REGISTRY
+    snapshot = {}
+    for stage in STAGES:
+        snapshot[stage] = (
+            REGISTRY.get_sample_value("sarvam_stage_duration_seconds_count", {"stage": stage}) or 0.0,
+            REGISTRY.get_sample_value("sarvam_stage_duration_seconds_sum", {"stage": stage}) or 0.0
+        )
+    return snapshot
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+async def run_scenario(run_one, requests: int, concurrency: int, audio_seconds: float) -> dict:
+    """Runs run_one() `requests` times, `concurrency` at a time, and summarizes latency and throughput."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = []
+
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                ok = await run_one()
+            except Exception as e:
+                ok, detail = False, getattr(e, "detail", None) or str(e)
+            else:
+                detail = None if ok else "unsuccessful response"
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors.append(detail)
+
+    before = stage_snapshot()
+    started = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    after = stage_snapshot()
+
+    stages = {}
+    for stage in STAGES:
+        count = after[stage][0] - before[stage][0]
+        total = after[stage][1] - before[stage][1]
+        if count:
+            stages[stage] = {"count": int(count), "total_seconds": round(total, 3), "mean_seconds": round(total / count, 4)}
+
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 3),
+        "p50_seconds": round(float(np.percentile(latencies, 50)), 3),
+        "p99_seconds": round(float(np.percentile(latencies, 99)), 3),
+        "audio_seconds_per_second": round(requests * audio_seconds / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": stages
+    }
+
+
+async def run_benchmarks(args, files: dict, sarvam_url: str) -> list:
+    import httpx
+    import app as app_module
+    from utils.sarvam.client_helper import get_http_client
+    from utils.sarvam.sarvam_helper import transcribe_with_sarvam
+    from utils.celery.async_pipeline import transcribe_url
+
+    parameters = sys.modules["parameters"]
+    report = []
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+        for seconds, path in files.items():
+            name = os.path.basename(path)
+            s3_key = f"bench/{name}"
+            if "s3" in args.scenarios:
+                await asyncio.to_thread(parameters.s3_client.upload_file, path, BENCH_BUCKET, s3_key)
+
+            async def endpoint():
+                with open(path, "rb") as f:
+                    response = await client.post(
+                        "/sarvam/transcribe",
+                        data={"source_type": "file", "ingest_mode": args.ingest_mode},
+                        files={"audio": (name, f, "audio/wav")}
+                    )
+                return response.status_code == 200 and "results" in response.json()
+
+            async def engine():
+                with open(path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    try:
+                        return (await transcribe_with_sarvam(mapped)).get("message") == "success"
+                    finally:
+                        try:
+                            mapped.close()
+                        except BufferError:
+                            pass  # A chunk reader still holds a view; the map is freed with it
+
+            async def s3():
+                response = await app_module.get_audio_for_transcription(s3_key, http_client=get_http_client())
+                return "results" in response
+
+            async def celery():
+                return "results" in await transcribe_url(f"{sarvam_url}/files/{name}")
+
+            runners = {"endpoint": endpoint, "engine": engine, "s3": s3, "celery": celery}
+            for scenario in args.scenarios:
+                result = await run_scenario(runners[scenario], args.requests, args.concurrency, seconds)
+                result.update(scenario=scenario, audio_seconds=seconds)
+                report.append(result)
+                print(
+                    f"{scenario:>8} {seconds:>6}s  rps={result['requests_per_second']:<8} "
+                    f"p50={result['p50_seconds']:<8} p99={result['p99_seconds']:<8} "
+                    f"audio_s/s={result['audio_seconds_per_second']:<9} rss={result['peak_rss_mb']}MB "
+                    f"errors={result['errors']}",
+                    flush=True
+                )
+        await client.aclose()
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the transcription pipeline")
+    parser.add_argument("--durations", default="60,600,3600,7200", help="Comma-separated synthetic WAV lengths in seconds")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per scenario and duration")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--ingest-mode", default="s3", choices=("s3", "direct"), help="ingest_mode for the endpoint scenario")
+    parser.add_argument("--sarvam-latency", type=float, default=0.2, help="Fixed fake Sarvam latency per chunk (s)")
+    parser.add_argument("--sarvam-latency-per-second", type=float, default=0.002, help="Extra fake Sarvam latency per audio second")
+    parser.add_argument("--sarvam-error-rate", type=float, default=0.0, help="Fraction of chunk calls answered with 503")
+    parser.add_argument("--sarvam-throttle-rate", type=float, default=0.0, help="Fraction of chunk calls answered with 429")
+    parser.add_argument("--openai-latency", type=float, default=0.1)
+    parser.add_argument("--base-port", type=int, default=18700)
+    parser.add_argument("--output", help="Write the full JSON report here")
+    args = parser.parse_args()
+    args.durations = [int(d) for d in args.durations.split(",") if d]
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {sorted(unknown)}")
+    return args
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="sarvam-bench-")
+    sarvam_port, openai_port, s3_port = args.base_port, args.base_port + 1, args.base_port + 2
+    sarvam_url = f"http://127.0.0.1:{sarvam_port}"
+
+    services = []
+    try:
+        files = {}
+        for seconds in args.durations:
+            files[seconds] = write_synthetic_wav(
+                os.path.join(workdir, f"conversation_{seconds}s.wav"), seconds, args.sample_rate, args.channels, seed=seconds
+            )
+        print(f"Generated {len(files)} synthetic recordings in {workdir}", flush=True)
+
+        services.append(start_service(
+            "sarvam", sarvam_port, latency=args.sarvam_latency, latency_per_audio_second=args.sarvam_latency_per_second,
+            error_rate=args.sarvam_error_rate, throttle_rate=args.sarvam_throttle_rate, files_dir=workdir
+        ))
+        services.append(start_service("openai", openai_port, latency=args.openai_latency))
+        services.append(start_service("s3", s3_port))
+
+        # The app reads its configuration at import time, so point it at the fakes first
+        os.environ.update({
+            "SARVAM_API_URL": f"{sarvam_url}/speech-to-text",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            "OPENAI_API_KEY": "bench",
+            "TRANSCRIPT_CACHE_BACKEND": "none",  # Every request must do the full work
+            "TRANSLATION_CACHE_BACKEND": "none",  # Likewise for the translation memo, or repeats skip translation
+            "SPOOL_DIR": workdir,
+        })
+        install_bench_parameters(f"http://127.0.0.1:{s3_port}")
+
+        report = asyncio.run(run_benchmarks(args, files, sarvam_url))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"settings": {k: v for k, v in vars(args).items() if k != "output"}, "results": report}, f, indent=2)
+            print(f"Wrote report to {args.output}")
+    finally:
+        for service in services:
+            service.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
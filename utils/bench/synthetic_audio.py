@@ -0,0 +1,45 @@
+import numpy as np
+from utils.audio.wav_helper import WavInfo, WAVE_FORMAT_PCM, build_wav_header
+
+# Generated in blocks so a two-hour file never sits in memory as floats
+BLOCK_SECONDS = 30
+
+
+def write_synthetic_wav(path: str, seconds: float, sample_rate: int = 16000, channels: int = 1, seed: int = 0) -> str:
+    """
+    Writes a 16-bit PCM WAV that looks like a shop-floor recording: a noise
+    floor with speech-like bursts (modulated harmonics, 1-8 s long) separated
+    by pauses, so silence snapping and VAD have something realistic to find.
+    """
+    rng = np.random.default_rng(seed)
+    total_frames = int(seconds * sample_rate)
+    info = WavInfo(WAVE_FORMAT_PCM, channels, sample_rate, 16, 2 * channels, 44, total_frames * 2 * channels)
+
+    # Alternating pause/burst lengths for the whole file, in frames
+    bursts = []
+    position = 0
+    while position < total_frames:
+        position += int(rng.uniform(0.3, 4.0) * sample_rate)
+        length = int(rng.uniform(1.0, 8.0) * sample_rate)
+        bursts.append((position, min(position + length, total_frames), rng.uniform(110, 260)))
+        position += length
+
+    with open(path, "wb") as f:
+        f.write(build_wav_header(info, info.data_size))
+        block_frames = BLOCK_SECONDS * sample_rate
+        for start in range(0, total_frames, block_frames):
+            end = min(start + block_frames, total_frames)
+            t = np.arange(start, end) / sample_rate
+            block = rng.normal(0.0, 0.004, end - start)
+            for burst_start, burst_end, pitch in bursts:
+                if burst_end <= start or burst_start >= end:
+                    continue
+                lo, hi = max(burst_start, start) - start, min(burst_end, end) - start
+                tt = t[lo:hi]
+                envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * tt)  # Syllable-rate modulation
+                block[lo:hi] += 0.25 * envelope * (np.sin(2 * np.pi * pitch * tt) + 0.5 * np.sin(2 * np.pi * 2 * pitch * tt))
+            samples = (np.clip(block, -1.0, 1.0) * 32767).astype("<i2")
+            if channels > 1:
+                samples = np.repeat(samples, channels)
+            f.write(samples.tobytes())
+    return path
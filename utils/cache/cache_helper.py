@@ -0,0 +1,318 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from utils.configs.config import (
+    TRANSCRIPT_CACHE_BACKEND,
+    TRANSCRIPT_CACHE_TTL,
+    TRANSCRIPT_CACHE_MAX_ENTRIES,
+    TRANSCRIPT_CACHE_MAX_BYTES,
+    REDIS_URL,
+    TRANSLATION_CACHE_BACKEND,
+    TRANSLATION_CACHE_TTL,
+    TRANSLATION_CACHE_MAX_ENTRIES,
+    TRANSLATION_CACHE_MAX_BYTES,
+)
+
+HASH_BLOCK_SIZE = 1024 * 1024  # Feed SHA-256 in 1 MB blocks
+
+
+def compute_audio_hash(audio) -> str:
+    """
+    Returns the SHA-256 hex digest of the audio. Accepts bytes or a binary
+    file-like object, which is read in blocks and rewound afterwards.
+    """
+    sha = hashlib.sha256()
+    if isinstance(audio, (bytes, bytearray, memoryview)):
+        view = memoryview(audio)
+        for offset in range(0, len(view), HASH_BLOCK_SIZE):
+            sha.update(view[offset:offset + HASH_BLOCK_SIZE])
+        return sha.hexdigest()
+
+    start = audio.tell()
+    while True:
+        block = audio.read(HASH_BLOCK_SIZE)
+        if not block:
+            break
+        sha.update(block)
+    audio.seek(start)
+    return sha.hexdigest()
+
+
+def build_cache_key(audio_hash: str, model: str, with_diarization: bool, with_timestamps: bool) -> str:
+    """Cache key covering the audio content and every option that changes the transcript."""
+    return f"sarvam:transcript:{audio_hash}:{model}:diar={int(with_diarization)}:ts={int(with_timestamps)}"
+
+
+def normalize_utterance(text: str) -> str:
+    """Unicode-normalized, case-folded text with collapsed whitespace, so repeated phrases share a key."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def build_translation_key(text: str, source_lang: str, model: str) -> str:
+    """Translation memo key for (normalized text, source language, model)."""
+    digest = hashlib.sha1(normalize_utterance(text).encode("utf-8")).hexdigest()
+    return f"sarvam:translation:{model}:{(source_lang or '').strip().lower()}:{digest}"
+
+
+class MemoryCacheBackend:
+    """In-process LRU with a TTL and an entry/byte budget."""
+
+    def __init__(self, ttl: int, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: dict):
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            logging.info("Skipping cache for %s: %d bytes exceeds cache budget", key, size)
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, copy.deepcopy(value))
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    async def has(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    async def get_many(self, keys: list) -> list:
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: dict):
+        for key, value in items.items():
+            await self.set(key, value)
+
+    def _evict(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+
+class RedisCacheBackend:
+    """
+    Redis-backed cache. Entries expire through SETEX; size-based eviction is
+    left to the server's maxmemory policy.
+    """
+
+    def __init__(self, url: str, ttl: int):
+        import redis.asyncio as redis  # Optional dependency, only needed for this backend
+        self.ttl = ttl
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._redis.get(key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict):
+        await self._redis.setex(key, self.ttl, json.dumps(value, ensure_ascii=False, default=str))
+
+    async def has(self, key: str) -> bool:
+        return bool(await self._redis.exists(key))
+
+    async def get_many(self, keys: list) -> list:
+        """One MGET round trip for many keys."""
+        raws = await self._redis.mget(keys) if keys else []
+        return [json.loads(raw) if raw else None for raw in raws]
+
+    async def set_many(self, items: dict):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.setex(key, self.ttl, json.dumps(value, ensure_ascii=False, default=str))
+            await pipe.execute()
+
+
+class MongoCacheBackend:
+    """
+    Stores cached transcripts as separate documents in transcripts_collection.
+    A TTL index on cache_expires_at lets Mongo expire them.
+    """
+
+    def __init__(self, ttl: int):
+        from parameters import transcripts_collection
+        self.ttl = ttl
+        self._collection = transcripts_collection
+        self._collection.create_index("cache_key", sparse=True)
+        self._collection.create_index("cache_expires_at", expireAfterSeconds=0, sparse=True)
+
+    def _find(self, key: str):
+        return self._collection.find_one(
+            {"cache_key": key, "cache_expires_at": {"$gt": datetime.utcnow()}},
+            {"_id": 0, "results": 1}
+        )
+
+    async def get(self, key: str):
+        doc = await asyncio.to_thread(self._find, key)
+        return doc["results"] if doc else None
+
+    async def set(self, key: str, value: dict):
+        await asyncio.to_thread(
+            self._collection.update_one,
+            {"cache_key": key},
+            {"$set": {
+                "cache_key": key,
+                "results": value,
+                "type": "sarvam_cache",
+                "cache_expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)
+            }},
+            upsert=True
+        )
+
+    async def has(self, key: str) -> bool:
+        return await asyncio.to_thread(self._find, key) is not None
+
+
+class TranscriptCache:
+    """Wraps a backend with hit/miss counters. Backend errors are logged and treated as misses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str):
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logging.error("Transcript cache lookup failed: %s", str(e))
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: dict):
+        try:
+            await self.backend.set(key, value)
+        except Exception as e:
+            logging.error("Transcript cache store failed: %s", str(e))
+
+    async def has(self, key: str) -> bool:
+        """Checks for a live entry without touching the hit/miss counters."""
+        try:
+            return await self.backend.has(key)
+        except Exception as e:
+            logging.error("Transcript cache lookup failed: %s", str(e))
+            return False
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+class TranslationCache:
+    """
+    Memoizes translations per utterance: an in-process LRU in front of an
+    optional Redis backend, which shares translations between workers and
+    survives restarts. Backend errors are logged and treated as misses.
+    """
+
+    def __init__(self, memory: MemoryCacheBackend, persistent=None):
+        self.memory = memory
+        self.persistent = persistent
+        self.hits = 0
+        self.misses = 0
+
+    async def get_many(self, keys: list) -> dict:
+        """Returns {key: translation} for the keys found."""
+        found = {}
+        for key, value in zip(keys, await self.memory.get_many(keys)):
+            if value is not None:
+                found[key] = value
+        missing = [key for key in keys if key not in found]
+        if missing and self.persistent is not None:
+            try:
+                values = await self.persistent.get_many(missing)
+            except Exception as e:
+                logging.error("Translation cache lookup failed: %s", str(e))
+                values = [None] * len(missing)
+            promoted = {key: value for key, value in zip(missing, values) if value is not None}
+            await self.memory.set_many(promoted)
+            found.update(promoted)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set_many(self, items: dict):
+        if not items:
+            return
+        await self.memory.set_many(items)
+        if self.persistent is not None:
+            try:
+                await self.persistent.set_many(items)
+            except Exception as e:
+                logging.error("Translation cache store failed: %s", str(e))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis" if self.persistent is not None else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+_transcript_cache = None
+_translation_cache = None
+
+
+def get_transcript_cache():
+    """
+    Returns the process-wide transcript cache, or None when
+    TRANSCRIPT_CACHE_BACKEND is "none".
+    """
+    global _transcript_cache
+    if _transcript_cache is None:
+        if TRANSCRIPT_CACHE_BACKEND == "none":
+            return None
+        if TRANSCRIPT_CACHE_BACKEND == "redis":
+            backend = RedisCacheBackend(REDIS_URL, TRANSCRIPT_CACHE_TTL)
+        elif TRANSCRIPT_CACHE_BACKEND == "mongo":
+            backend = MongoCacheBackend(TRANSCRIPT_CACHE_TTL)
+        else:
+            backend = MemoryCacheBackend(TRANSCRIPT_CACHE_TTL, TRANSCRIPT_CACHE_MAX_ENTRIES, TRANSCRIPT_CACHE_MAX_BYTES)
+        _transcript_cache = TranscriptCache(backend)
+        logging.info("Initialized transcript cache with %s", type(backend).__name__)
+    return _transcript_cache
+
+
+def get_translation_cache():
+    """
+    Returns the process-wide translation memo, or None when
+    TRANSLATION_CACHE_BACKEND is "none".
+    """
+    global _translation_cache
+    if _translation_cache is None:
+        if TRANSLATION_CACHE_BACKEND == "none":
+            return None
+        memory = MemoryCacheBackend(TRANSLATION_CACHE_TTL, TRANSLATION_CACHE_MAX_ENTRIES, TRANSLATION_CACHE_MAX_BYTES)
+        persistent = RedisCacheBackend(REDIS_URL, TRANSLATION_CACHE_TTL) if TRANSLATION_CACHE_BACKEND == "redis" else None
+        _translation_cache = TranslationCache(memory, persistent)
+    return _translation_cache
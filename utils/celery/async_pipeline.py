@@ -0,0 +1,78 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import uuid
+
+# utils.* is imported inside the functions below: celery_app, the worker entry
+# point, puts the repository root on sys.path before it imports this module
+
+# In-flight transcriptions per worker process
+WORKER_ASYNC_CONCURRENCY = int(os.getenv("WORKER_ASYNC_CONCURRENCY", "32"))
+
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+_job_semaphore = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns this process's transcription event loop, started on a daemon thread.
+    Recreated after a fork so prefork children don't share the parent's loop.
+    """
+    global _loop, _loop_pid, _job_semaphore
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _job_semaphore = None
+            threading.Thread(target=_loop.run_forever, name="transcription-loop", daemon=True).start()
+            logging.info("Started transcription event loop in worker process %d", _loop_pid)
+        return _loop
+
+
+def run_async(coro, timeout: float = None):
+    """Runs a coroutine on the worker's event loop and blocks the calling task thread on it."""
+    from utils.tracing.tracing_helper import bind_context
+
+    # The loop thread doesn't inherit this thread's context; carry the task's trace over explicitly
+    future = asyncio.run_coroutine_threadsafe(bind_context(coro), get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()  # Don't leave the transcription running on the loop
+        raise
+
+
+async def transcribe_url(audio_url: str) -> dict:
+    """
+    Downloads a recording into a local spool and transcribes it with the
+    in-process engine; the S3 copy, if enabled, is archived in the background.
+    Returns the same {"results": ...} body as the HTTP API.
+    """
+    from utils.sarvam.client_helper import get_http_client
+    from utils.sarvam.sarvam_helper import transcribe_with_sarvam, format_transcription_response
+    from utils.storage.s3_helper import iter_url
+    from utils.storage.spool_helper import spool_stream, archive_in_background
+    from utils.configs.config import S3_ARCHIVE
+
+    global _job_semaphore
+    if _job_semaphore is None:
+        _job_semaphore = asyncio.Semaphore(WORKER_ASYNC_CONCURRENCY)
+
+    async with _job_semaphore:
+        http_client = get_http_client()
+        spool = await spool_stream(iter_url(audio_url, http_client))
+        try:
+            if S3_ARCHIVE:
+                filename = os.path.basename(audio_url.split('?')[0])
+                archive_in_background(spool, f"temp/{uuid.uuid4()}/{filename}")
+            response = await transcribe_with_sarvam(spool.map(), http_client=http_client, audio_hash=spool.audio_hash)
+        finally:
+            spool.release()
+
+    if response.get("message") != "success":
+        raise RuntimeError(response.get("error", "Transcription failed"))
+    return format_transcription_response(response)
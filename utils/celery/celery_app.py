@@ -1,6 +1,26 @@
+import logging
+import math
+import os
+import sys
+import time
+
+# The worker is started from utils/celery ("celery -A celery_app") or from the
+# repository root; make both the sibling modules and the utils package importable
+# before anything below imports them
+CELERY_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(CELERY_DIR, "..", ".."))
+for path in (CELERY_DIR, REPO_ROOT):
+    if path not in sys.path:
+        sys.path.append(path)
+
 from celery import Celery
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import before_task_publish, task_prerun, task_postrun
 import requests
-import httpx
+from async_pipeline import run_async, transcribe_url
+from fair_scheduler import release_slot
+from utils.tracing.tracing_helper import begin_span, end_span, inject_headers, extract_context
+from utils.configs.config import JOB_POLL_INTERVAL, JOB_DEADLINE
 
 celery = Celery("workers")
 celery.conf.broker_url = "redis://localhost:6379/0"
@@ -11,33 +31,103 @@ celery.conf.worker_prefetch_multiplier = 1  # Prevent task reservation
 celery.conf.task_acks_late = True           # Acknowledge tasks only after completion
 
 
-@celery.task(bind=True, soft_time_limit=1000, time_limit=1030)  # bind=True to access self.retry
-def transcribe_audio(self, audio_url, merged_audio_id, store_name, source_type="url"):
+# Open task spans by task id, closed in task_postrun
+_task_spans = {}
+
+
+@before_task_publish.connect
+def inject_trace_headers(headers=None, **kwargs):
+    """Carries the publisher's trace context (producer, or a retrying task) in the message headers."""
+    if headers is not None:
+        headers.update(inject_headers())
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    """Opens the task's span as a child of the publisher's, from the headers set above."""
+    carrier = {key: getattr(task.request, key, None) for key in ("traceparent", "tracestate")}
+    _task_spans[task_id] = begin_span(
+        f"celery {task.name}",
+        {"celery.task_id": task_id, "celery.retries": task.request.retries},
+        parent=extract_context({key: value for key, value in carrier.items() if value})
+    )
+
+
+@task_postrun.connect
+def end_task_span(task_id=None, state=None, **kwargs):
+    opened = _task_spans.pop(task_id, None)
+    if opened is not None:
+        span, token = opened
+        span.set_attribute("celery.state", state or "")
+        end_span(span, token)
+
+
+@task_postrun.connect
+def release_fair_slot(task_id=None, task=None, state=None, **kwargs):
+    """Frees the store's slot of a task dispatched by fair_scheduler; a retrying task keeps it."""
+    if state == "RETRY" or not getattr(task.request, "fair_store", None):
+        return
+    try:
+        release_slot(task_id, "completed" if state == "SUCCESS" else "failed")
+    except Exception as e:
+        logging.error("Could not release fair-scheduling slot of task %s: %s", task_id, str(e))
+
+
+# Each run of transcribe_audio polls until its soft time limit, then retries to keep polling;
+# allow enough runs to cover JOB_DEADLINE, plus the usual three for request and job failures
+TRANSCRIBE_SOFT_TIME_LIMIT = 1000
+JOB_POLL_MAX_RETRIES = math.ceil(JOB_DEADLINE / TRANSCRIBE_SOFT_TIME_LIMIT)
+TRANSCRIBE_MAX_RETRIES = JOB_POLL_MAX_RETRIES + 3
+
+# "api" posts to the FastAPI service, "inprocess" runs the transcription engine inside the worker
+TRANSCRIBE_MODE = os.getenv("TRANSCRIBE_MODE", "api").lower()
+INPROCESS_TIMEOUT = float(os.getenv("INPROCESS_TIMEOUT", "3600"))
+
+
+@celery.task(bind=True, soft_time_limit=TRANSCRIBE_SOFT_TIME_LIMIT, time_limit=TRANSCRIBE_SOFT_TIME_LIMIT + 30, max_retries=TRANSCRIBE_MAX_RETRIES)  # bind=True to access self.retry
+def transcribe_audio(self, audio_url, merged_audio_id, store_name, source_type="url", job_id=None):
     """
-    Sends an audio file to the transcription API.
-    Retries up to 3 times on failure and logs results.
+    Submits an audio file to the transcription job API and polls until it finishes.
+    The job id is carried into retries, so a retry resumes polling the same job
+    instead of transcribing the file again.
     """
-    api_endpoint = "http://localhost:8000/sarvam/transcribe"  # FastAPI endpoint
+    jobs_endpoint = "http://localhost:8000/sarvam/jobs"  # FastAPI job API
     target_api_endpoint = "http://dashboard.cur8.in:8081/api/update_db_transcript/"
-    
-    timeout = (30, 900)
+
+    retry_args = (audio_url, merged_audio_id, store_name)
     try:
-        # Post to the transcription API
-        response = requests.post(
-            api_endpoint,
-            data={
-                "source_type": (None, source_type),
-                "audio_url": (None, audio_url)
-            },
-            timeout=timeout
-        )
-        response.raise_for_status()
-        transcription_result = response.json()  # Get the transcription result
+        # Submitting returns as soon as the job is queued
+        if job_id is None:
+            response = requests.post(
+                jobs_endpoint,
+                data={
+                    "source_type": (None, source_type),
+                    "audio_url": (None, audio_url)
+                },
+                headers=inject_headers(),
+                timeout=(30, 60)
+            )
+            response.raise_for_status()
+            job_id = response.json()["job_id"]
+
+        while True:
+            response = requests.get(f"{jobs_endpoint}/{job_id}", headers=inject_headers(), timeout=(10, 30))
+            response.raise_for_status()
+            job = response.json()
+            if job["status"] == "completed":
+                break
+            if job["status"] == "failed":
+                # The job itself failed; start a fresh one
+                raise self.retry(args=retry_args, kwargs={"source_type": source_type, "job_id": None}, countdown=30)
+            time.sleep(JOB_POLL_INTERVAL)
+
+        transcription_result = {"results": job["results"]}
 
         # Add merged_audio_id and store_name to the transcription result
         transcription_result["merged_audio_id"] = merged_audio_id
         transcription_result["store_name"] = store_name
         transcription_result["access_url_chunks"] = audio_url
+        transcription_result["job_id"] = job_id
 
         # # Optionally post the transcription result to a second API
         # post_response = requests.post(
@@ -49,7 +139,44 @@ def transcribe_audio(self, audio_url, merged_audio_id, store_name, source_type="
 
         return transcription_result
 
-    except requests.exceptions.ReadTimeout:
-        raise self.retry(countdown=30, max_retries=5)  # Retry with backoff
+    except SoftTimeLimitExceeded:
+        # Still running upstream; keep polling the same job in a new task run, until JOB_DEADLINE
+        raise self.retry(args=retry_args, kwargs={"source_type": source_type, "job_id": job_id}, countdown=0, max_retries=JOB_POLL_MAX_RETRIES)
     except requests.exceptions.RequestException as exc:
+        raise self.retry(exc=exc, args=retry_args, kwargs={"source_type": source_type, "job_id": job_id}, countdown=30)
+
+
+@celery.task(bind=True, max_retries=3)
+def transcribe_audio_inprocess(self, audio_url, merged_audio_id, store_name, source_type="url"):
+    """
+    Transcribes an audio URL inside the worker on its shared asyncio loop
+    instead of calling the FastAPI service. Run the worker with the threads
+    pool (see worker.py) so one process keeps many transcriptions in flight.
+    """
+    try:
+        transcription_result = run_async(transcribe_url(audio_url), timeout=INPROCESS_TIMEOUT)
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=30)
+
+    # Add merged_audio_id and store_name to the transcription result
+    transcription_result["merged_audio_id"] = merged_audio_id
+    transcription_result["store_name"] = store_name
+    transcription_result["access_url_chunks"] = audio_url
+
+    return transcription_result
+
+
+@celery.task(bind=True, max_retries=3)
+def transcribe_manifest_group(self, group):
+    """
+    Transcribes every recording of one merged_audio_id in-process through a
+    bounded pipeline and returns a single aggregated result, chunks ordered by
+    conversation time. Failed recordings are marked in the result, not retried.
+    """
+    from utils.jobs.manifest_helper import process_manifest
+
+    try:
+        aggregated = run_async(process_manifest({"access_urls": [group]}, transcribe_url), timeout=INPROCESS_TIMEOUT)
+    except Exception as exc:
         raise self.retry(exc=exc, countdown=30)
+    return aggregated[0] if aggregated else None
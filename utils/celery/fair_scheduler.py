@@ -0,0 +1,305 @@
+"""
+Tenant-aware dispatch in front of the audio_transcription Celery queue.
+
+Producers put tasks into Redis lanes per store instead of publishing them
+straight to Celery. One dispatcher process moves them to Celery:
+
+    * lanes are served in priority order: urgent, then default, then backfill
+    * within a lane, stores take turns by weighted fair queuing: each dispatch
+      advances the store's virtual time by 1/weight and the store with the
+      lowest virtual time goes next; a store that becomes active joins at the
+      lane's current minimum, so an idle store can't bank credit
+    * a store never has more than its cap of tasks in flight, and no more than
+      FAIR_MAX_IN_FLIGHT tasks are handed to Celery at once, so the Celery
+      queue stays short and the order chosen here is the order workers see
+
+Slots are released from the worker's task_postrun (see celery_app.py), and
+reclaimed after FAIR_SLOT_TIMEOUT if a worker died holding one.
+
+    python fair_scheduler.py dispatch   # run the dispatcher
+    python fair_scheduler.py stats      # per-store queue, wait and throughput
+"""
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+
+FAIR_REDIS_URL = os.getenv("FAIR_REDIS_URL", "redis://localhost:6379/0")
+FAIR_PREFIX = os.getenv("FAIR_PREFIX", "sarvam:fair")
+LANES = ("urgent", "default", "backfill")
+
+# Tasks handed to Celery at once; roughly the total worker concurrency
+FAIR_MAX_IN_FLIGHT = int(os.getenv("FAIR_MAX_IN_FLIGHT", "10"))
+# Per-store caps and weights: "BLR=4,DEL=2"; stores not listed use the defaults
+FAIR_STORE_CONCURRENCY = int(os.getenv("FAIR_STORE_CONCURRENCY", "3"))
+FAIR_STORE_CAPS = os.getenv("FAIR_STORE_CAPS", "")
+FAIR_STORE_WEIGHTS = os.getenv("FAIR_STORE_WEIGHTS", "")
+# A slot not released within this long (worker killed mid-task) is reclaimed
+FAIR_SLOT_TIMEOUT = float(os.getenv("FAIR_SLOT_TIMEOUT", "7200"))
+# Completed-task buckets kept for the throughput figures
+THROUGHPUT_BUCKET_SECONDS = 60
+THROUGHPUT_WINDOW_BUCKETS = 15
+
+CELERY_QUEUE = "audio_transcription"
+
+# Adds a task to a store's queue in a lane; the store joins the lane's rotation at
+# the current minimum virtual time if it wasn't waiting already
+_ENQUEUE = """
+local prefix, lane, store, item = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+local rotation = prefix .. ':lane:' .. lane
+redis.call('RPUSH', prefix .. ':queue:' .. lane .. ':' .. store, item)
+if not redis.call('ZSCORE', rotation, store) then
+    local head = redis.call('ZRANGE', rotation, 0, 0, 'WITHSCORES')
+    redis.call('ZADD', rotation, head[2] or 0, store)
+end
+redis.call('LPUSH', prefix .. ':wake', 1)
+redis.call('LTRIM', prefix .. ':wake', 0, 0)
+return 1
+"""
+
+# Pops the next task to dispatch and takes its slots, or returns nil if every
+# waiting store is at its cap or the global limit is reached
+_DISPATCH = """
+local prefix, now, task_id = ARGV[1], tonumber(ARGV[2]), ARGV[3]
+local max_in_flight, default_cap = tonumber(ARGV[4]), tonumber(ARGV[5])
+if tonumber(redis.call('HLEN', prefix .. ':inflight')) >= max_in_flight then
+    return nil
+end
+for i = 6, #ARGV do
+    local lane = ARGV[i]
+    local rotation = prefix .. ':lane:' .. lane
+    local stores = redis.call('ZRANGE', rotation, 0, -1, 'WITHSCORES')
+    for j = 1, #stores, 2 do
+        local store, vtime = stores[j], tonumber(stores[j + 1])
+        local cap = tonumber(redis.call('HGET', prefix .. ':caps', store) or default_cap)
+        local running = tonumber(redis.call('HGET', prefix .. ':running', store) or 0)
+        if running < cap then
+            local queue = prefix .. ':queue:' .. lane .. ':' .. store
+            local item = redis.call('LPOP', queue)
+            if item then
+                if redis.call('LLEN', queue) == 0 then
+                    redis.call('ZREM', rotation, store)
+                else
+                    local weight = tonumber(redis.call('HGET', prefix .. ':weights', store) or 1)
+                    redis.call('ZADD', rotation, vtime + 1 / weight, store)
+                end
+                redis.call('HINCRBY', prefix .. ':running', store, 1)
+                redis.call('HSET', prefix .. ':inflight', task_id, cjson.encode({store = store, lane = lane, dispatched_at = now}))
+                return {lane, store, item}
+            end
+            redis.call('ZREM', rotation, store)
+        end
+    end
+end
+return nil
+"""
+
+# Frees a task's slots once (a retried task keeps them) and records the outcome
+_RELEASE = """
+local prefix, task_id, now, outcome = ARGV[1], ARGV[2], tonumber(ARGV[3]), ARGV[4]
+local entry = redis.call('HGET', prefix .. ':inflight', task_id)
+if not entry then
+    return 0
+end
+entry = cjson.decode(entry)
+redis.call('HDEL', prefix .. ':inflight', task_id)
+redis.call('HINCRBY', prefix .. ':running', entry.store, -1)
+local stats = prefix .. ':stats:' .. entry.store
+redis.call('HINCRBY', stats, outcome, 1)
+redis.call('HINCRBYFLOAT', stats, 'run_seconds', now - entry.dispatched_at)
+local bucket = prefix .. ':done:' .. math.floor(now / tonumber(ARGV[5]))
+redis.call('HINCRBY', bucket, entry.store, 1)
+redis.call('EXPIRE', bucket, tonumber(ARGV[5]) * (tonumber(ARGV[6]) + 1))
+redis.call('LPUSH', prefix .. ':wake', 1)
+redis.call('LTRIM', prefix .. ':wake', 0, 0)
+return 1
+"""
+
+_redis = None
+_scripts = {}
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        import redis  # Installed with the Celery Redis broker
+        _redis = redis.Redis.from_url(FAIR_REDIS_URL, decode_responses=True)
+    return _redis
+
+
+def _script(name: str, source: str):
+    if name not in _scripts:
+        _scripts[name] = get_redis().register_script(source)
+    return _scripts[name]
+
+
+def parse_store_values(spec: str) -> dict:
+    """Parses "store=value,store=value" into {store: float}."""
+    values = {}
+    for item in spec.split(","):
+        store, _, value = item.strip().partition("=")
+        if store and value:
+            values[store.strip()] = float(value)
+    return values
+
+
+def store_key(store_name, merged_audio_id=None) -> str:
+    """Fairness key of a task: its store, or the merged audio id when the store is missing."""
+    return str(store_name or merged_audio_id or "unknown")
+
+
+def enqueue_fair(task_name: str, args: list, kwargs: dict = None, store: str = "unknown", lane: str = "default", headers: dict = None):
+    """
+    Queues a task for store in a lane instead of publishing it to Celery.
+    headers (e.g. trace context) are sent with the task when it is dispatched.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane {lane!r}; expected one of {LANES}")
+    item = json.dumps({
+        "task": task_name,
+        "args": list(args),
+        "kwargs": kwargs or {},
+        "headers": headers or {},
+        "enqueued_at": time.time(),
+    })
+    _script("enqueue", _ENQUEUE)(args=[FAIR_PREFIX, lane, store, item])
+
+
+def release_slot(task_id: str, outcome: str) -> bool:
+    """Frees a dispatched task's slots; outcome is "completed" or "failed". Returns False if it held none."""
+    return bool(_script("release", _RELEASE)(args=[
+        FAIR_PREFIX, task_id, time.time(), outcome, THROUGHPUT_BUCKET_SECONDS, THROUGHPUT_WINDOW_BUCKETS
+    ]))
+
+
+def sync_store_settings():
+    """Writes the configured caps and weights to Redis, where the dispatch script reads them."""
+    client = get_redis()
+    for setting, spec in (("caps", FAIR_STORE_CAPS), ("weights", FAIR_STORE_WEIGHTS)):
+        key = f"{FAIR_PREFIX}:{setting}"
+        values = parse_store_values(spec)
+        pipe = client.pipeline()
+        pipe.delete(key)
+        if values:
+            pipe.hset(key, mapping=values)
+        pipe.execute()
+
+
+def reclaim_stale_slots(now: float = None) -> int:
+    """Releases slots held longer than FAIR_SLOT_TIMEOUT (the worker died without task_postrun)."""
+    now = now or time.time()
+    reclaimed = 0
+    for task_id, entry in get_redis().hgetall(f"{FAIR_PREFIX}:inflight").items():
+        if now - json.loads(entry)["dispatched_at"] > FAIR_SLOT_TIMEOUT and release_slot(task_id, "failed"):
+            logging.warning("Reclaimed fair-scheduling slot of task %s", task_id)
+            reclaimed += 1
+    return reclaimed
+
+
+def dispatch_next(send) -> bool:
+    """
+    Dispatches one task if a slot is free; send(task_name, args, kwargs, task_id, headers)
+    publishes it. Returns False when nothing could be dispatched.
+    """
+    task_id = str(uuid.uuid4())
+    now = time.time()
+    popped = _script("dispatch", _DISPATCH)(args=[FAIR_PREFIX, now, task_id, FAIR_MAX_IN_FLIGHT, FAIR_STORE_CONCURRENCY, *LANES])
+    if not popped:
+        return False
+    lane, store, raw = popped
+    item = json.loads(raw)
+    wait = now - item["enqueued_at"]
+
+    stats = f"{FAIR_PREFIX}:stats:{store}"
+    pipe = get_redis().pipeline()
+    pipe.hincrby(stats, "dispatched", 1)
+    pipe.hincrbyfloat(stats, "wait_seconds", wait)
+    pipe.hincrbyfloat(stats, f"wait_seconds:{lane}", wait)
+    pipe.hincrby(stats, f"dispatched:{lane}", 1)
+    pipe.execute()
+    # Only ever increases; a read-compare-write is fine with a single dispatcher
+    if wait > float(get_redis().hget(stats, "max_wait_seconds") or 0):
+        get_redis().hset(stats, "max_wait_seconds", wait)
+
+    headers = dict(item.get("headers") or {}, fair_store=store, fair_lane=lane)
+    try:
+        send(item["task"], item["args"], item["kwargs"], task_id, headers)
+    except Exception:
+        release_slot(task_id, "failed")
+        get_redis().rpush(f"{FAIR_PREFIX}:dead", raw)
+        raise
+    logging.info("Dispatched %s for store %s from lane %s after %.1f seconds", item["task"], store, lane, wait)
+    return True
+
+
+def run_dispatcher(send, idle_timeout: float = 1.0):
+    """Dispatches for as long as slots are free, then sleeps until a task is queued or released."""
+    sync_store_settings()
+    client = get_redis()
+    last_reclaim = 0.0
+    while True:
+        if time.time() - last_reclaim > 60:
+            reclaim_stale_slots()
+            last_reclaim = time.time()
+        try:
+            dispatched = dispatch_next(send)
+        except Exception as e:
+            logging.error("Dispatch failed: %s", str(e))
+            dispatched = False
+        if not dispatched:
+            client.brpop(f"{FAIR_PREFIX}:wake", timeout=idle_timeout)
+
+
+def fair_stats() -> dict:
+    """Per-store queue lengths, in-flight tasks, wait times and recent throughput."""
+    client = get_redis()
+    caps = parse_store_values(FAIR_STORE_CAPS)
+    weights = parse_store_values(FAIR_STORE_WEIGHTS)
+    running = client.hgetall(f"{FAIR_PREFIX}:running")
+    now = time.time()
+    current_bucket = int(now // THROUGHPUT_BUCKET_SECONDS)
+    buckets = [client.hgetall(f"{FAIR_PREFIX}:done:{current_bucket - i}") for i in range(THROUGHPUT_WINDOW_BUCKETS)]
+
+    stores = set(running)
+    stores.update(key.rsplit(":", 1)[1] for key in client.scan_iter(f"{FAIR_PREFIX}:stats:*"))
+    queued = {}
+    for lane in LANES:
+        for store in client.zrange(f"{FAIR_PREFIX}:lane:{lane}", 0, -1):
+            queued.setdefault(store, {})[lane] = client.llen(f"{FAIR_PREFIX}:queue:{lane}:{store}")
+            stores.add(store)
+
+    report = {}
+    for store in sorted(stores):
+        stats = client.hgetall(f"{FAIR_PREFIX}:stats:{store}")
+        dispatched = int(stats.get("dispatched", 0))
+        finished = int(stats.get("completed", 0)) + int(stats.get("failed", 0))
+        recent = sum(int(bucket.get(store, 0)) for bucket in buckets)
+        report[store] = {
+            "queued": queued.get(store, {}),
+            "in_flight": int(running.get(store, 0)),
+            "cap": caps.get(store, FAIR_STORE_CONCURRENCY),
+            "weight": weights.get(store, 1.0),
+            "dispatched": dispatched,
+            "completed": int(stats.get("completed", 0)),
+            "failed": int(stats.get("failed", 0)),
+            "avg_wait_seconds": round(float(stats.get("wait_seconds", 0)) / dispatched, 3) if dispatched else 0.0,
+            "max_wait_seconds": round(float(stats.get("max_wait_seconds", 0)), 3),
+            "avg_run_seconds": round(float(stats.get("run_seconds", 0)) / finished, 3) if finished else 0.0,
+            "completed_per_minute": round(recent / THROUGHPUT_WINDOW_BUCKETS, 3),
+        }
+    return report
+
+
+def _celery_send(task_name, args, kwargs, task_id, headers):
+    from celery_app import celery
+    celery.send_task(task_name, args=args, kwargs=kwargs, task_id=task_id, headers=headers, queue=CELERY_QUEUE)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        print(json.dumps(fair_stats(), indent=2))
+    else:
+        run_dispatcher(_celery_send)
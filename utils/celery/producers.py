@@ -1,6 +1,19 @@
+import os
+import sys
 import requests
-from celery_app import transcribe_audio
+from celery_app import transcribe_audio, transcribe_audio_inprocess, transcribe_manifest_group, TRANSCRIBE_MODE
 from celery import group
+from utils.jobs.manifest_helper import normalize_manifest
+from utils.tracing.tracing_helper import start_span, inject_headers
+from fair_scheduler import enqueue_fair, store_key, LANES
+
+# Tasks per group(...).apply_async call in queue_tasks
+PRODUCER_BATCH_SIZE = int(os.getenv("PRODUCER_BATCH_SIZE", "5"))
+
+# "true" queues tasks per store in fair_scheduler's Redis lanes (run `python fair_scheduler.py dispatch`)
+# instead of publishing them straight to Celery; PRODUCER_LANE is the lane they go to
+FAIR_SCHEDULING = os.getenv("FAIR_SCHEDULING", "false").lower() == "true"
+PRODUCER_LANE = os.getenv("PRODUCER_LANE", "default")
 
 API_ENDPOINT = {
   "access_urls": [
@@ -41,9 +54,10 @@ def fetch_audio_data():
         return None
 
 
-def queue_tasks():
+def queue_tasks(lane: str = PRODUCER_LANE):
     """
-    Fetch audio data from the API and queue transcription tasks in batches.
+    Fetch audio data from the API and queue transcription tasks in batches,
+    or per store in the given fair-scheduling lane when FAIR_SCHEDULING is on.
     """
     audio_data = API_ENDPOINT
     if not audio_data:
@@ -56,6 +70,9 @@ def queue_tasks():
         print("No access URLs found in the audio data.")
         return
 
+    # In-process workers transcribe directly instead of calling the FastAPI service
+    task = transcribe_audio_inprocess if TRANSCRIBE_MODE == "inprocess" else transcribe_audio
+
     task_batches = []
     for access_entry in access_urls:
         merged_audio_id = access_entry.get("merged_audio_id")
@@ -72,15 +89,52 @@ def queue_tasks():
 
             # Add tasks to the batch
             task_batches.append(
-                transcribe_audio.s(audio_url, merged_audio_id, store_name)  # Add the task to the batch
+                task.s(audio_url, merged_audio_id, store_name)  # Add the task to the batch
             )
 
-    # Divide tasks into chunks of 5 for batch processing
-    for i in range(0, len(task_batches), 5):
-        batch = task_batches[i:i + 5]
-        print(f"Queueing batch with {len(batch)} tasks...")
-        group(batch).apply_async(queue="audio_transcription")
+    # Divide tasks into chunks for batch processing; every task's trace starts at this span
+    with start_span("producer queue_tasks", {"producer.tasks": len(task_batches)}):
+        if FAIR_SCHEDULING:
+            headers = inject_headers()
+            for signature in task_batches:
+                audio_url, merged_audio_id, store_name = signature.args
+                enqueue_fair(signature.task, signature.args, store=store_key(store_name, merged_audio_id), lane=lane, headers=headers)
+            print(f"Queued {len(task_batches)} tasks in the {lane} lane")
+            return
+        for i in range(0, len(task_batches), PRODUCER_BATCH_SIZE):
+            batch = task_batches[i:i + PRODUCER_BATCH_SIZE]
+            print(f"Queueing batch with {len(batch)} tasks...")
+            group(batch).apply_async(queue="audio_transcription")
+
+
+def queue_manifest(lane: str = PRODUCER_LANE):
+    """
+    Queues one transcribe_manifest_group task per merged_audio_id. URLs are
+    de-duplicated across the manifest, and each task returns one aggregated
+    result with the chunks in conversation order. In-flight recordings per
+    task are bounded by MANIFEST_CONCURRENCY.
+    """
+    audio_data = API_ENDPOINT
+    groups = normalize_manifest(audio_data or {})
+    if not groups:
+        print("No access URLs found in the audio data.")
+        return
+
+    for manifest_group in groups:
+        print(f"Queueing {len(manifest_group['access_url_chunks'])} recordings for {manifest_group['store_name']} (ID: {manifest_group['merged_audio_id']})")
+        with start_span("producer queue_manifest", {"merged_audio_id": manifest_group["merged_audio_id"]}):
+            if FAIR_SCHEDULING:
+                store = store_key(manifest_group.get("store_name"), manifest_group["merged_audio_id"])
+                enqueue_fair(transcribe_manifest_group.name, [manifest_group], store=store, lane=lane, headers=inject_headers())
+            else:
+                transcribe_manifest_group.s(manifest_group).apply_async(queue="audio_transcription")
 
 
 if __name__ == "__main__":
-    queue_tasks()
\ No newline at end of file
+    # python producers.py manifest -> one aggregated task per merged_audio_id
+    # A lane name anywhere in the arguments (urgent, default, backfill) picks the fair-scheduling lane
+    lane = next((arg for arg in sys.argv[1:] if arg in LANES), PRODUCER_LANE)
+    if "manifest" in sys.argv[1:]:
+        queue_manifest(lane)
+    else:
+        queue_tasks(lane)
\ No newline at end of file
@@ -1,10 +1,20 @@
-from celery_app import celery
+from celery_app import celery, TRANSCRIBE_MODE
+from async_pipeline import WORKER_ASYNC_CONCURRENCY
 
 celery.conf.update(
     task_routes={
         'celery_app.transcribe_audio': 'audio_transcription',
+        'celery_app.transcribe_audio_inprocess': 'audio_transcription',
+        'celery_app.transcribe_manifest_group': 'audio_transcription',
     }
 )
 
+if TRANSCRIBE_MODE == "inprocess":
+    # Task threads only wait on the shared event loop, so one process can run many of them
+    celery.conf.update(
+        worker_pool="threads",
+        worker_concurrency=WORKER_ASYNC_CONCURRENCY,
+    )
+
 if __name__ == "__main__":
     celery.start()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import logging
 import os
+import tempfile
 
 # Sarvam API subscription key
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY", "6200f2f5-a94c-4537-a98c-075ae49935e4")
@@ -8,4 +9,126 @@ if not SARVAM_API_KEY:
     raise ValueError("SARVAM_API_KEY is required but not set in environment variables.")
 
 # API endpoint
-SARVAM_API_URL = "https://api.sarvam.ai/speech-to-text"
\ No newline at end of file
+SARVAM_API_URL = os.getenv("SARVAM_API_URL", "https://api.sarvam.ai/speech-to-text")
+
+# Shared HTTP client pool for Sarvam calls
+SARVAM_MAX_CONNECTIONS = int(os.getenv("SARVAM_MAX_CONNECTIONS", "100"))
+SARVAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SARVAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+SARVAM_KEEPALIVE_EXPIRY = float(os.getenv("SARVAM_KEEPALIVE_EXPIRY", "60"))
+SARVAM_HTTP2 = os.getenv("SARVAM_HTTP2", "true").lower() == "true"
+
+# Translation (OpenAI chat completions); OPENAI_BASE_URL may point at a local stub
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+TRANSLATION_MODEL = os.getenv("TRANSLATION_MODEL", "gpt-4o-mini")
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "40"))
+TRANSLATION_BATCH_MAX_CHARS = int(os.getenv("TRANSLATION_BATCH_MAX_CHARS", "6000"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "8"))
+
+# Sarvam request options (also part of the transcript cache key)
+SARVAM_MODEL = os.getenv("SARVAM_MODEL", "saarika:v2")
+SARVAM_WITH_DIARIZATION = os.getenv("SARVAM_WITH_DIARIZATION", "true").lower() == "true"
+SARVAM_WITH_TIMESTAMPS = os.getenv("SARVAM_WITH_TIMESTAMPS", "true").lower() == "true"
+
+# Content-addressed transcript cache: memory, redis, mongo or none
+TRANSCRIPT_CACHE_BACKEND = os.getenv("TRANSCRIPT_CACHE_BACKEND", "memory").lower()
+TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", str(7 * 24 * 3600)))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "500"))
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/1")
+
+# Translation memo: "memory", "redis" (memory in front of Redis) or "none"
+TRANSLATION_CACHE_BACKEND = os.getenv("TRANSLATION_CACHE_BACKEND", "memory").lower()
+TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600)))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "100000"))
+TRANSLATION_CACHE_MAX_BYTES = int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Streaming ingest into S3 multipart uploads
+INGEST_READ_CHUNK_SIZE = int(os.getenv("INGEST_READ_CHUNK_SIZE", str(1024 * 1024)))
+S3_PART_SIZE = max(int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024))), 5 * 1024 * 1024)  # S3 minimum part size is 5 MB
+S3_UPLOAD_CONCURRENCY = int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Ingest mode: "s3" uploads then downloads from S3, "direct" transcribes from a local spool
+INGEST_MODE = os.getenv("INGEST_MODE", "s3").lower()
+S3_ARCHIVE = os.getenv("S3_ARCHIVE", "true").lower() == "true"
+SPOOL_DIR = os.getenv("SPOOL_DIR", os.path.join(tempfile.gettempdir(), "sarvam-spool"))
+
+# Default layout of audio_segments in responses: "rows" (a dict per segment) or "columnar" (a list per field)
+RESPONSE_SEGMENT_FORMAT = os.getenv("RESPONSE_SEGMENT_FORMAT", "rows").lower()
+
+# Admission control: each request reserves its estimated peak memory against ADMISSION_MEMORY_BUDGET
+# (0 disables the limit); requests that don't fit wait up to ADMISSION_QUEUE_TIMEOUT, then get a 503
+ADMISSION_MEMORY_BUDGET = int(os.getenv("ADMISSION_MEMORY_BUDGET", str(2 * 1024 * 1024 * 1024)))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+ADMISSION_MAX_WAITING = int(os.getenv("ADMISSION_MAX_WAITING", "32"))  # Beyond this many waiting requests, shed at once
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "10"))  # Retry-After until typical hold times are known
+ADMISSION_BASE_BYTES = int(os.getenv("ADMISSION_BASE_BYTES", str(32 * 1024 * 1024)))  # Per-request overhead (response, buffers)
+ADMISSION_DECODE_EXPANSION = float(os.getenv("ADMISSION_DECODE_EXPANSION", "12"))  # Decoded PCM bytes per compressed (MP3) byte
+ADMISSION_SPOOL_THRESHOLD = int(os.getenv("ADMISSION_SPOOL_THRESHOLD", str(64 * 1024 * 1024)))  # S3 downloads above this go to the disk spool
+
+# Chunking of long recordings
+CHUNK_DURATION = float(os.getenv("CHUNK_DURATION", "300"))  # Upper bound per Sarvam request, overlap included
+CHUNK_OVERLAP = float(os.getenv("CHUNK_OVERLAP", "2"))
+SILENCE_SEARCH_WINDOW = float(os.getenv("SILENCE_SEARCH_WINDOW", "15"))  # Seconds before each boundary searched for a pause
+SILENCE_WINDOW_MS = int(os.getenv("SILENCE_WINDOW_MS", "30"))
+
+# Chunk scheduling against the Sarvam quota
+SARVAM_GLOBAL_CONCURRENCY = int(os.getenv("SARVAM_GLOBAL_CONCURRENCY", "16"))  # In-flight chunks across all requests
+SARVAM_REQUEST_CONCURRENCY = int(os.getenv("SARVAM_REQUEST_CONCURRENCY", "4"))  # In-flight chunks per recording
+SARVAM_RATE_LIMIT = float(os.getenv("SARVAM_RATE_LIMIT", "5"))  # Requests per second, 0 disables
+SARVAM_RATE_BURST = int(os.getenv("SARVAM_RATE_BURST", "10"))
+CHUNK_MAX_RETRIES = int(os.getenv("CHUNK_MAX_RETRIES", "3"))
+CHUNK_RETRY_BASE_DELAY = float(os.getenv("CHUNK_RETRY_BASE_DELAY", "2"))
+CHUNK_RETRY_MAX_DELAY = float(os.getenv("CHUNK_RETRY_MAX_DELAY", "60"))
+
+# Job API webhooks and Celery polling
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "3"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "30"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "10"))
+JOB_DEADLINE = float(os.getenv("JOB_DEADLINE", str(4 * 3600)))  # How long a Celery task keeps polling one job before giving up
+
+# Write-behind for job updates and logs: queued writes are coalesced per job and sent to
+# Mongo in one bulk_write per batch, once JOB_WRITE_BATCH_SIZE are queued or after JOB_WRITE_FLUSH_INTERVAL seconds
+JOB_WRITE_BATCH_SIZE = int(os.getenv("JOB_WRITE_BATCH_SIZE", "200"))
+JOB_WRITE_FLUSH_INTERVAL = float(os.getenv("JOB_WRITE_FLUSH_INTERVAL", "0.5"))
+JOB_WRITE_QUEUE_SIZE = int(os.getenv("JOB_WRITE_QUEUE_SIZE", "10000"))  # Producers wait when this many writes are pending
+
+# Manifest ingestion: recordings transcribed at once per manifest
+MANIFEST_CONCURRENCY = int(os.getenv("MANIFEST_CONCURRENCY", "8"))
+
+# Preprocessing before upload: mono, resampled, optionally encoded (wav, flac or mp3)
+PREPROCESS_AUDIO = os.getenv("PREPROCESS_AUDIO", "true").lower() == "true"
+PREPROCESS_SAMPLE_RATE = int(os.getenv("PREPROCESS_SAMPLE_RATE", "16000"))
+PREPROCESS_FORMAT = os.getenv("PREPROCESS_FORMAT", "wav").lower()
+
+# Process pool for CPU-bound audio work
+AUDIO_POOL_WORKERS = int(os.getenv("AUDIO_POOL_WORKERS", str(os.cpu_count() or 2)))
+AUDIO_POOL_START_METHOD = os.getenv("AUDIO_POOL_START_METHOD", "spawn")
+AUDIO_POOL_MAX_QUEUE = int(os.getenv("AUDIO_POOL_MAX_QUEUE", "64"))  # Tasks waiting behind the running ones
+AUDIO_POOL_WARM = os.getenv("AUDIO_POOL_WARM", "true").lower() == "true"
+
+# Voice-activity detection: drop silence and send only packed speech regions to Sarvam
+VAD_ENABLED = os.getenv("VAD_ENABLED", "false").lower() == "true"
+VAD_WINDOW_MS = int(os.getenv("VAD_WINDOW_MS", "30"))
+VAD_ENERGY_MARGIN_DB = float(os.getenv("VAD_ENERGY_MARGIN_DB", "12"))  # Above the recording's noise floor
+VAD_MIN_ENERGY_DB = float(os.getenv("VAD_MIN_ENERGY_DB", "-55"))  # Never treat quieter windows as speech
+VAD_ZCR_THRESHOLD = float(os.getenv("VAD_ZCR_THRESHOLD", "0.3"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+VAD_MIN_SILENCE_MS = int(os.getenv("VAD_MIN_SILENCE_MS", "600"))
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "200"))
+
+# Tracing: "none" (context is still propagated), "console", or "file" (one JSON span per line)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "utils/logs/traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "sarvam-api")
+
+# Logging: records are queued and written by a listener thread, as JSON lines ("json") or plain text ("text")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_FILE = os.getenv("LOG_FILE", "utils/logs/app.log")
+LOG_ERROR_FILE = os.getenv("LOG_ERROR_FILE", "utils/logs/error.log")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records beyond this are dropped, never waited on
+# Cap on INFO/DEBUG records per second per logger (module name for the root logger), e.g. "sarvam_helper=20,httpx=5";
+# LOG_INFO_RATE_DEFAULT applies to the rest (0 = unlimited). WARNING and above are always kept
+LOG_INFO_RATE_LIMITS = os.getenv("LOG_INFO_RATE_LIMITS", "")
+LOG_INFO_RATE_DEFAULT = float(os.getenv("LOG_INFO_RATE_DEFAULT", "0"))
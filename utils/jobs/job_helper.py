@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from utils.configs.config import WEBHOOK_MAX_ATTEMPTS, WEBHOOK_TIMEOUT
+from utils.jobs.writer_helper import get_job_writer
+from utils.logs.log_helper import context_with
+
+# Jobs running on the API's event loop, kept referenced until they finish
+_running_jobs = set()
+
+# Statuses written through immediately, so pollers and webhooks see the final state
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+async def create_job(s3_key: str, file_name: str, source_type: str, callback_url: str = None, audio_url: str = None) -> str:
+    """Inserts the transcript and task_tracker records for a new job and returns its id."""
+    from parameters import transcripts_collection, task_tracker  # Connects to Mongo on first use, not at import
+    transcript_record = {
+        "s3_key": s3_key,
+        "status": "queued",
+        "timestamp": datetime.utcnow(),
+        "file_name": file_name,
+        "type": "sarvam",
+        "source_type": source_type,
+        "audio_url": audio_url,
+        "callback_url": callback_url,
+        "chunks_done": 0,
+        "chunks_total": None,
+        "partial_results": {}
+    }
+    inserted = await asyncio.to_thread(transcripts_collection.insert_one, transcript_record)
+    transcript_id = str(inserted.inserted_id)
+    await asyncio.to_thread(task_tracker.insert_one, {
+        "transcript_id": transcript_id,
+        "status": "queued",
+        "type": "sarvam"
+    })
+    return transcript_id
+
+
+async def update_job(transcript_id: str, status: str = None, fields: dict = None, increments: dict = None):
+    """
+    Queues an update of the transcript record (and task_tracker when the status
+    changes) on the write-behind queue. Terminal statuses wait until written.
+    """
+    writer = get_job_writer()
+    fields = dict(fields or {})
+    if status:
+        fields["status"] = status
+    await writer.update(transcript_id, fields, increments, status)
+    if status in TERMINAL_STATUSES:
+        await writer.flush()
+
+
+async def log_job(transcript_id: str, level: str, message: str):
+    await get_job_writer().log(transcript_id, level, message)
+
+
+async def get_job(transcript_id: str):
+    """Returns the job's public view, or None if the id is unknown or malformed."""
+    try:
+        object_id = ObjectId(transcript_id)
+    except (InvalidId, TypeError):
+        return None
+    from parameters import transcripts_collection
+    record = await asyncio.to_thread(transcripts_collection.find_one, {"_id": object_id})
+    if record is None:
+        return None
+    partial = record.get("partial_results") or {}
+    return {
+        "job_id": transcript_id,
+        "status": record.get("status"),
+        "chunks_done": record.get("chunks_done", 0),
+        "chunks_total": record.get("chunks_total"),
+        "partial_results": [partial[key] for key in sorted(partial, key=int)],
+        "results": record.get("results"),
+        "error": record.get("error")
+    }
+
+
+async def send_webhook(http_client, callback_url: str, payload: dict):
+    """POSTs the finished job to callback_url, retrying a few times with backoff."""
+    for attempt in range(WEBHOOK_MAX_ATTEMPTS):
+        try:
+            response = await http_client.post(callback_url, json=payload, timeout=WEBHOOK_TIMEOUT)
+            response.raise_for_status()
+            logging.info("Delivered webhook for job %s to %s", payload.get("job_id"), callback_url)
+            return True
+        except Exception as e:
+            logging.warning("Webhook attempt %d for job %s failed: %s", attempt + 1, payload.get("job_id"), str(e))
+            await asyncio.sleep(2 ** attempt)
+    logging.error("Giving up on webhook for job %s", payload.get("job_id"))
+    return False
+
+
+def start_job(coro, job_id: str = None) -> asyncio.Task:
+    """Runs a job coroutine in the background on the API's event loop; its log records carry job_id."""
+    task = asyncio.create_task(coro, context=context_with(job_id=job_id))
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    return task
+
+
+async def drain_jobs():
+    """Waits for running jobs. Called from the FastAPI shutdown hook."""
+    if _running_jobs:
+        logging.info("Waiting for %d running transcription jobs", len(_running_jobs))
+        await asyncio.gather(*list(_running_jobs), return_exceptions=True)
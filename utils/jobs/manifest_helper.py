@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import os
+import re
+from utils.configs.config import MANIFEST_CONCURRENCY
+
+# Store recordings are named conversation_<start HH-MM-SS>_<end HH-MM-SS>.wav
+CONVERSATION_PATTERN = re.compile(r"conversation_(\d{2})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})")
+
+
+def url_identity(audio_url: str) -> str:
+    """Presigned URLs for the same object differ only in the query string."""
+    return audio_url.split('?')[0]
+
+
+def conversation_times(audio_url: str):
+    """Returns (start, end) as "HH:MM:SS" parsed from the file name, or (None, None)."""
+    match = CONVERSATION_PATTERN.search(os.path.basename(url_identity(audio_url)))
+    if not match:
+        return None, None
+    h1, m1, s1, h2, m2, s2 = match.groups()
+    return f"{h1}:{m1}:{s1}", f"{h2}:{m2}:{s2}"
+
+
+def normalize_manifest(manifest: dict) -> list:
+    """
+    Turns an {"access_urls": [...]} document into one group per merged_audio_id.
+    Entries for the same id are combined, URLs are de-duplicated across the whole
+    manifest, and each group's URLs are ordered by conversation start time.
+    """
+    groups = {}
+    seen = set()
+    for access_entry in manifest.get("access_urls", []):
+        merged_audio_id = access_entry.get("merged_audio_id")
+        store_name = access_entry.get("store_name")
+        if not merged_audio_id or not store_name:
+            logging.warning("Missing required data in access entry: %s", access_entry)
+            continue
+
+        group = groups.setdefault(merged_audio_id, {
+            "merged_audio_id": merged_audio_id,
+            "store_name": store_name,
+            "access_url_chunks": []
+        })
+        for audio_url in access_entry.get("access_url_chunks", []):
+            if not audio_url or url_identity(audio_url) in seen:
+                continue
+            seen.add(url_identity(audio_url))
+            group["access_url_chunks"].append(audio_url)
+
+    for group in groups.values():
+        # Files without a parsable timestamp keep their manifest order, after the dated ones
+        group["access_url_chunks"].sort(key=lambda url: (conversation_times(url)[0] is None, conversation_times(url)[0] or ""))
+    return list(groups.values())
+
+
+async def process_manifest(manifest: dict, transcribe_url, concurrency: int = MANIFEST_CONCURRENCY, on_url_done=None) -> list:
+    """
+    Transcribes every unique URL in the manifest through one bounded pipeline
+    (at most `concurrency` recordings in flight) and returns one aggregated
+    result per merged_audio_id with its chunks in conversation order.
+
+    transcribe_url(url) must return the API's {"results": ...} body or raise.
+    on_url_done(url, ok), if given, is awaited as each URL finishes.
+    """
+    groups = normalize_manifest(manifest)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(audio_url: str) -> dict:
+        start, end = conversation_times(audio_url)
+        chunk = {"access_url_chunk": audio_url, "conversation_start": start, "conversation_end": end}
+        async with semaphore:
+            try:
+                chunk["results"] = (await transcribe_url(audio_url))["results"]
+            except Exception as e:
+                logging.error("Manifest transcription failed for %s: %s", url_identity(audio_url), str(e))
+                chunk["error"] = getattr(e, "detail", None) or str(e)
+        if on_url_done is not None:
+            await on_url_done(audio_url, "error" not in chunk)
+        return chunk
+
+    # Schedule every group at once so the semaphore, not group boundaries, bounds throughput
+    chunk_lists = await asyncio.gather(*(
+        asyncio.gather(*(run_one(url) for url in group["access_url_chunks"]))
+        for group in groups
+    ))
+
+    aggregated = []
+    for group, chunks in zip(groups, chunk_lists):
+        aggregated.append({
+            "merged_audio_id": group["merged_audio_id"],
+            "store_name": group["store_name"],
+            "complete": all("error" not in chunk for chunk in chunks),
+            "chunks": list(chunks)
+        })
+    return aggregated
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from utils.configs.config import JOB_WRITE_BATCH_SIZE, JOB_WRITE_FLUSH_INTERVAL, JOB_WRITE_QUEUE_SIZE
+
+
+class JobWriter:
+    """
+    Write-behind queue for job state and execution logs. Callers enqueue and
+    return; a worker task on the event loop collects writes until
+    batch_size are queued or flush_interval has passed since the first,
+    coalesces them per transcript ($set merged, later values win; $inc
+    summed; last task_tracker status wins) and sends one unordered
+    bulk_write per collection from a thread.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue = None
+        self._worker = None
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.last_flush_seconds = 0.0
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue(self.max_queue)
+            self._worker = asyncio.create_task(self._run())
+
+    async def update(self, transcript_id: str, fields: dict = None, increments: dict = None, status: str = None):
+        self._ensure_started()
+        self.queued += 1
+        await self._queue.put(("update", transcript_id, fields or {}, increments or {}, status))
+
+    async def log(self, transcript_id: str, level: str, message: str):
+        self._ensure_started()
+        self.queued += 1
+        await self._queue.put(("log", transcript_id, level, message))
+
+    async def flush(self):
+        """
+        Returns once everything queued before the call has been written.
+        Raises the batch's error if any of those writes failed, so a lost
+        terminal status reaches the caller instead of leaving the job in progress.
+        """
+        if self._worker is None:
+            return
+        self._ensure_started()
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put(("flush", done))
+        await done
+
+    async def close(self):
+        """Drains the queue and stops the worker. Called from the FastAPI shutdown hook."""
+        if self._worker is None:
+            return
+        pending = self._queue.qsize()
+        if pending:
+            logging.info("Flushing %d queued job writes", pending)
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.error("Job writes were lost at shutdown: %s", str(e))
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        error = None  # First failure since the last flush was answered
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] != "flush":
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            writes = [item for item in batch if item[0] != "flush"]
+            if writes:
+                error = await self._write(writes) or error
+            flushes = [item[1] for item in batch if item[0] == "flush"]
+            for done in flushes:
+                if done.done():
+                    continue
+                if error is not None:
+                    done.set_exception(error)
+                else:
+                    done.set_result(None)
+            if flushes:
+                error = None
+
+    async def _write(self, writes: list):
+        """Writes one batch; returns the exception if it failed."""
+        updates = {}   # transcript_id -> {"$set": ..., "$inc": ...}
+        statuses = {}  # transcript_id -> task_tracker status
+        logs = []
+        for item in writes:
+            if item[0] == "log":
+                logs.append(item[1:])
+                continue
+            _, transcript_id, fields, increments, status = item
+            update = updates.setdefault(transcript_id, {"$set": {}, "$inc": {}})
+            update["$set"].update(fields)
+            for key, value in increments.items():
+                update["$inc"][key] = update["$inc"].get(key, 0) + value
+            if status:
+                statuses[transcript_id] = status
+
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.to_thread(_apply_writes, updates, statuses, logs)
+            self.written += len(writes)
+            logging.debug("Wrote %d job writes as %d updates and %d log entries", len(writes), len(updates), len(logs))
+        except Exception as e:
+            self.failed_batches += 1
+            logging.error("Job write batch of %d writes failed: %s", len(writes), str(e))
+            error = e
+        self.batches += 1
+        self.last_flush_seconds = time.perf_counter() - start
+        return error
+
+
+def _apply_writes(updates: dict, statuses: dict, logs: list):
+    from bson import ObjectId
+    from pymongo import UpdateOne
+    from parameters import transcripts_collection, task_tracker, append_log_to_db
+
+    operations = [
+        UpdateOne({"_id": ObjectId(transcript_id)}, {op: values for op, values in update.items() if values})
+        for transcript_id, update in updates.items()
+        if update["$set"] or update["$inc"]
+    ]
+    if operations:
+        transcripts_collection.bulk_write(operations, ordered=False)
+    if statuses:
+        task_tracker.bulk_write(
+            [UpdateOne({"transcript_id": transcript_id}, {"$set": {"status": status}}) for transcript_id, status in statuses.items()],
+            ordered=False
+        )
+    # append_log_to_db owns the log document format, so log entries share this thread hop instead of an insert_many
+    for transcript_id, level, message in logs:
+        append_log_to_db(transcript_id, level, message)
+
+
+_job_writer = None
+
+
+def get_job_writer() -> JobWriter:
+    global _job_writer
+    if _job_writer is None:
+        _job_writer = JobWriter(JOB_WRITE_BATCH_SIZE, JOB_WRITE_FLUSH_INTERVAL, JOB_WRITE_QUEUE_SIZE)
+    return _job_writer
+
+
+def get_job_writer_stats():
+    return _job_writer.stats() if _job_writer is not None else None
+
+
+async def close_job_writer():
+    if _job_writer is not None:
+        await _job_writer.close()
@@ -1,25 +1,249 @@
+import atexit
+import contextvars
+import copy
+import json
+import queue
+import threading
 import time
 import logging
-from logging.handlers import RotatingFileHandler
-
-# General logging configuration (app logs)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("utils/logs/app.log"),  # Log general info to app.log
-        logging.StreamHandler()                     # Log general info to console
-    ]
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from utils.configs.config import (
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_FILE,
+    LOG_ERROR_FILE,
+    LOG_QUEUE_SIZE,
+    LOG_INFO_RATE_LIMITS,
+    LOG_INFO_RATE_DEFAULT,
 )
 
-# Separate error logger
-error_logger = logging.getLogger("error")
-error_handler = RotatingFileHandler("utils/logs/error.log", maxBytes=5*1024*1024, backupCount=5)  # Rotate error logs
-error_handler.setLevel(logging.ERROR)
-error_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-error_handler.setFormatter(error_formatter)
-error_logger.addHandler(error_handler)
-error_logger.setLevel(logging.ERROR)
+# Ids attached to every record logged while they are set (see log_context)
+_request_id = contextvars.ContextVar("request_id", default=None)
+_job_id = contextvars.ContextVar("job_id", default=None)
+_chunk = contextvars.ContextVar("chunk", default=None)
+_CONTEXT_VARS = {"request_id": _request_id, "job_id": _job_id, "chunk": _chunk}
+CONTEXT_FIELDS = ("request_id", "job_id", "chunk", "trace_id")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Set up on first use by configure_logging(), so importing this module neither
+# touches the root logger nor opens (or creates) log files
+_listener = None
+_queue_handler = None
+_rate_filter = None
+
+
+def logger_key(record: logging.LogRecord) -> str:
+    """Name records are sampled and reported under: the module for records logged on the root logger."""
+    return record.module if record.name == "root" else record.name
+
+
+@contextmanager
+def log_context(**fields):
+    """Attaches request_id, job_id and/or chunk to records logged inside the block (and tasks started in it)."""
+    tokens = [(_CONTEXT_VARS[name], _CONTEXT_VARS[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def context_with(**fields) -> contextvars.Context:
+    """Copy of the current context with the given ids set, for asyncio.create_task(..., context=...)."""
+    ctx = contextvars.copy_context()
+    for name, value in fields.items():
+        ctx.run(_CONTEXT_VARS[name].set, value)
+    return ctx
+
+
+class ContextFilter(logging.Filter):
+    """Copies the context ids (and the current trace id) onto the record in the logging thread or task."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _CONTEXT_VARS.items():
+            setattr(record, name, var.get())
+        record.trace_id = None
+        try:
+            from opentelemetry import trace
+            span_context = trace.get_current_span().get_span_context()
+            if span_context.is_valid:
+                record.trace_id = format(span_context.trace_id, "032x")
+        except ImportError:
+            pass
+        return True
+
+
+class InfoRateLimitFilter(logging.Filter):
+    """
+    Token bucket per logger for INFO and DEBUG records: each logger may emit
+    its configured rate per second (with a burst of one second's worth, and
+    at least one record, so rates below 1/s still let records through);
+    the rest are dropped and counted, and the next record that gets through
+    carries the count as "suppressed". WARNING and above always pass.
+    """
+
+    def __init__(self, limits: dict, default: float):
+        super().__init__()
+        self.limits = limits
+        self.default = default
+        self.suppressed_total = 0
+        self._buckets = {}     # logger -> (tokens, last refill)
+        self._suppressed = {}  # logger -> records dropped since the last one kept
+        self._lock = threading.Lock()
+
+    def _rate(self, key: str) -> float:
+        name = key
+        while name:
+            if name in self.limits:
+                return self.limits[name]
+            name = name.rpartition(".")[0]
+        return self.default
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        key = logger_key(record)
+        rate = self._rate(key)
+        if not rate:
+            return True
+        capacity = max(rate, 1.0)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.suppressed_total += 1
+                return False
+            self._buckets[key] = (tokens - 1, now)
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of raising or waiting."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the args and render any traceback now, while they are valid; the
+        # listener thread does the (JSON) formatting and the file I/O
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context ids and traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": logger_key(record),
+            "message": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_rate_limits(spec: str) -> dict:
+    """Parses "name=rate,name=rate" into {name: rate}."""
+    limits = {}
+    for item in spec.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+def configure_logging():
+    """
+    Routes all logging through one non-blocking QueueHandler on the root
+    logger; a QueueListener thread formats the records and writes them to the
+    console, LOG_FILE and (ERROR and above) the rotating LOG_ERROR_FILE.
+    Safe to call more than once.
+    """
+    global _listener, _queue_handler, _rate_filter
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    error_handler = RotatingFileHandler(LOG_ERROR_FILE, maxBytes=5*1024*1024, backupCount=5, delay=True)  # Rotate error logs
+    error_handler.setLevel(logging.ERROR)
+    handlers = [logging.StreamHandler(), logging.FileHandler(LOG_FILE, delay=True), error_handler]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _rate_filter = InfoRateLimitFilter(parse_rate_limits(LOG_INFO_RATE_LIMITS), LOG_INFO_RATE_DEFAULT)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(_rate_filter)  # Before the context lookup, so dropped records cost less
+    _queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """
+    Writes out queued records and stops the listener thread. Called from the
+    FastAPI shutdown hook; anything logged afterwards is written directly.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        handler.addFilter(ContextFilter())
+        root.addHandler(handler)
+    _listener = None
+    _queue_handler = None  # Detached; get_logging_stats() reports nothing from here on
+
+
+def get_logging_stats():
+    if _queue_handler is None or _rate_filter is None:
+        return None
+    return {"dropped": _queue_handler.dropped, "suppressed": _rate_filter.suppressed_total}
+
+
+def get_error_logger() -> logging.Logger:
+    """Logger for errors; configure_logging() sends ERROR records from every logger to LOG_ERROR_FILE."""
+    configure_logging()
+    return logging.getLogger("error")
+
 
 # Utility function for monitoring execution time
 def log_execution_time(func):
@@ -28,11 +252,10 @@ def log_execution_time(func):
         try:
             result = await func(*args, **kwargs)
             duration = time.time() - start_time
-            logging.info(f"Execution time for {func.__name__}: {duration:.2f} seconds")
+            logging.info("Execution time for %s: %.2f seconds", func.__name__, duration)
             return result
         except Exception as e:
             # Log errors to the separate error log
-            error_logger.error(f"Error in {func.__name__}: {str(e)}", exc_info=True)
+            get_error_logger().error("Error in %s: %s", func.__name__, str(e), exc_info=True)
             raise
     return wrapper
-
@@ -0,0 +1,125 @@
+import functools
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+from utils.tracing.tracing_helper import start_span
+
+# Pipeline stages: ingest, s3_put, s3_get, decode, chunking, preprocess, sarvam, translation, merge
+STAGE_SECONDS = Histogram(
+    "sarvam_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+AUDIO_SECONDS = Counter(
+    "sarvam_audio_seconds_total",
+    "Seconds of audio processed (received) and sent upstream after VAD/preprocessing",
+    ["kind"]
+)
+BYTES = Counter(
+    "sarvam_bytes_total",
+    "Bytes ingested from clients/URLs and sent to upstream services",
+    ["direction", "peer"]
+)
+CHUNKS_IN_FLIGHT = Gauge("sarvam_chunks_in_flight", "Chunk requests currently waiting on the Sarvam API")
+UPSTREAM_ERRORS = Counter(
+    "sarvam_upstream_errors_total",
+    "Failed upstream calls by service and HTTP status (or error type)",
+    ["service", "status"]
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Records the wall time of the enclosed block, failed or not, under the stage
+    label, and traces it as a span of the same name (yielded for attributes).
+    """
+    start = time.perf_counter()
+    try:
+        with start_span(stage) as span:
+            yield span
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def timed_stage(stage: str):
+    """Decorator form of stage_timer for async functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_upstream_error(service: str, error: Exception):
+    """Counts an upstream failure under its HTTP status code, or its exception type."""
+    status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "status_code", None)
+    UPSTREAM_ERRORS.labels(service, str(status) if status else type(error).__name__).inc()
+
+
+class RuntimeStatsCollector:
+    """Exports state that other modules already keep (cache counters, audio pool queue) at scrape time."""
+
+    def collect(self):
+        from utils.cache.cache_helper import get_transcript_cache, get_translation_cache
+        from utils.audio.executor_helper import get_audio_pool_stats
+        from utils.jobs.writer_helper import get_job_writer_stats
+        from utils.logs.log_helper import get_logging_stats
+        from utils.admission.admission_helper import get_admission_stats
+
+        cache = get_transcript_cache()
+        if cache is not None:
+            stats = cache.stats()
+            lookups = CounterMetricFamily("sarvam_transcript_cache_lookups", "Transcript cache lookups", labels=["result"])
+            lookups.add_metric(["hit"], stats["hits"])
+            lookups.add_metric(["miss"], stats["misses"])
+            yield lookups
+            yield GaugeMetricFamily("sarvam_transcript_cache_hit_ratio", "Transcript cache hit ratio", value=stats["hit_ratio"])
+
+        translation_cache = get_translation_cache()
+        if translation_cache is not None:
+            stats = translation_cache.stats()
+            lookups = CounterMetricFamily("sarvam_translation_cache_lookups", "Translation memo lookups (per utterance)", labels=["result"])
+            lookups.add_metric(["hit"], stats["hits"])
+            lookups.add_metric(["miss"], stats["misses"])
+            yield lookups
+            yield GaugeMetricFamily("sarvam_translation_cache_hit_ratio", "Translation memo hit ratio", value=stats["hit_ratio"])
+
+        pool = get_audio_pool_stats()
+        yield GaugeMetricFamily("sarvam_audio_pool_waiting", "Audio pool tasks waiting for a slot", value=pool["waiting"])
+        yield GaugeMetricFamily("sarvam_audio_pool_in_pool", "Audio pool tasks submitted to the workers", value=pool["in_pool"])
+        yield GaugeMetricFamily("sarvam_audio_pool_avg_task_seconds", "Average recent audio pool task time", value=pool["avg_task_seconds"])
+
+        writer = get_job_writer_stats()
+        if writer is not None:
+            yield GaugeMetricFamily("sarvam_job_writes_pending", "Job writes queued for Mongo", value=writer["pending"])
+            yield CounterMetricFamily("sarvam_job_writes", "Job writes sent to Mongo", value=writer["written"])
+            yield CounterMetricFamily("sarvam_job_write_batches_failed", "Job write batches that failed", value=writer["failed_batches"])
+            yield GaugeMetricFamily("sarvam_job_write_flush_seconds", "Duration of the last job write batch", value=writer["last_flush_seconds"])
+
+        logs = get_logging_stats()
+        if logs is not None:
+            dropped = CounterMetricFamily("sarvam_log_records_dropped", "Log records not written", labels=["reason"])
+            dropped.add_metric(["queue_full"], logs["dropped"])
+            dropped.add_metric(["rate_limited"], logs["suppressed"])
+            yield dropped
+
+        admission = get_admission_stats()
+        if admission is not None:
+            yield GaugeMetricFamily("sarvam_admission_budget_bytes", "Memory budget for admitted requests (0 is unlimited)", value=admission["budget_bytes"])
+            yield GaugeMetricFamily("sarvam_admission_reserved_bytes", "Estimated memory reserved by admitted requests", value=admission["reserved_bytes"])
+            yield GaugeMetricFamily("sarvam_admission_active", "Requests holding a memory reservation", value=admission["active"])
+            yield GaugeMetricFamily("sarvam_admission_waiting", "Requests waiting for a memory reservation", value=admission["waiting"])
+            yield CounterMetricFamily("sarvam_admission_rejected", "Requests shed by admission control", value=admission["rejected"])
+
+
+REGISTRY.register(RuntimeStatsCollector())
+
+
+def metrics_payload():
+    """Returns (body, content type) for the /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
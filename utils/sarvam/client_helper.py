@@ -0,0 +1,62 @@
+import logging
+import httpx
+from utils.configs.config import (
+    SARVAM_MAX_CONNECTIONS,
+    SARVAM_MAX_KEEPALIVE_CONNECTIONS,
+    SARVAM_KEEPALIVE_EXPIRY,
+    SARVAM_HTTP2,
+)
+
+# App-lifetime client shared by every Sarvam call so chunks reuse pooled connections
+_http_client = None
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Builds a pooled httpx.AsyncClient for Sarvam calls.
+    Pool size, keep-alive and HTTP/2 are driven by the config module.
+    """
+    limits = httpx.Limits(
+        max_connections=SARVAM_MAX_CONNECTIONS,
+        max_keepalive_connections=SARVAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=SARVAM_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        connect=30.0,   # Max time to establish a connection
+        write=30.0,     # Max time to send audio chunk
+        read=420.0,     # Max time to receive transcription (7 minutes per chunk)
+        pool=300.0      # Max time to wait for a free pooled connection
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=SARVAM_HTTP2)
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Creates the shared client. Called from the FastAPI startup hook."""
+    global _http_client
+    if _http_client is None:
+        _http_client = build_http_client()
+        logging.info(
+            "Initialized shared Sarvam HTTP client (max_connections=%d, keepalive=%d, http2=%s)",
+            SARVAM_MAX_CONNECTIONS, SARVAM_MAX_KEEPALIVE_CONNECTIONS, SARVAM_HTTP2
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Closes the shared client. Called from the FastAPI shutdown hook."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logging.info("Closed shared Sarvam HTTP client")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client, creating it on first use for callers that
+    run outside the FastAPI lifecycle (scripts, workers).
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = build_http_client()
+    return _http_client
@@ -2,85 +2,156 @@ import asyncio
 from fastapi import HTTPException
 import logging
 import httpx
-import math
-import io
-from pydub import AudioSegment
+import mmap
 # from utils.logs.log_helper import log_execution_time
-from utils. configs.config import SARVAM_API_URL, SARVAM_API_KEY
-from openai import OpenAI
-import openai
-import os
-openai.api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
-
-
-async def transcribe_with_sarvam(audio_data: bytes) -> dict:
+from utils. configs.config import SARVAM_API_URL, SARVAM_API_KEY, SARVAM_MODEL, SARVAM_WITH_DIARIZATION, SARVAM_WITH_TIMESTAMPS
+from utils.configs.config import CHUNK_DURATION, CHUNK_OVERLAP, SILENCE_SEARCH_WINDOW, SILENCE_WINDOW_MS
+from utils.configs.config import PREPROCESS_AUDIO, PREPROCESS_SAMPLE_RATE, PREPROCESS_FORMAT, AUDIO_POOL_WORKERS
+from utils.configs.config import VAD_ENABLED, VAD_WINDOW_MS, VAD_ENERGY_MARGIN_DB, VAD_MIN_ENERGY_DB, VAD_ZCR_THRESHOLD
+from utils.configs.config import VAD_MIN_SPEECH_MS, VAD_MIN_SILENCE_MS, VAD_PADDING_MS
+from utils.cache.cache_helper import get_transcript_cache, compute_audio_hash, build_cache_key
+from utils.audio.wav_helper import parse_wav_header, MemoryReader, WavInfo, pcm_slice, build_wav_header
+from utils.audio.transcode_helper import preprocess_chunk, needs_preprocessing, decode_audio, detect_audio_format, AUDIO_FORMATS
+from utils.audio.executor_helper import run_in_audio_pool
+from utils.audio.chunk_helper import plan_chunks, build_chunk_readers, chunk_frame_ranges, rebase_segments, dedupe_overlap_words
+from utils.audio.vad_helper import detect_speech, pack_speech_regions
+from utils.sarvam.scheduler_helper import run_chunks
+from utils.sarvam.client_helper import get_http_client
+from utils.sarvam.translation_helper import translate_text, translate_batch
+from utils.sarvam.segment_helper import SegmentTable, segments_as, result_with_rows
+from utils.metrics.metrics_helper import stage_timer, record_upstream_error, AUDIO_SECONDS, BYTES, CHUNKS_IN_FLIGHT
+from utils.tracing.tracing_helper import start_span, traced, set_span_attributes
+from utils.logs.log_helper import log_context
+
+# Process-wide cap on raw chunk copies waiting for or in the audio pool (see chunk_preprocessor)
+_preprocess_slots = None
+
+
+def get_transcript_cache_key(audio_hash: str) -> str:
+    """Cache key for an audio hash under the current Sarvam request options."""
+    return build_cache_key(audio_hash, SARVAM_MODEL, SARVAM_WITH_DIARIZATION, SARVAM_WITH_TIMESTAMPS)
+
+
+async def get_cached_transcript(audio_hash: str):
+    """Returns the cached transcription result for an audio hash, if any."""
+    cache = get_transcript_cache()
+    if cache is None or not audio_hash:
+        return None
+    return await cache.get(get_transcript_cache_key(audio_hash))
+
+
+async def is_transcript_cached(audio_hash: str) -> bool:
+    """Checks the cache without counting a hit or miss."""
+    cache = get_transcript_cache()
+    if cache is None or not audio_hash:
+        return False
+    return await cache.has(get_transcript_cache_key(audio_hash))
+
+
+@traced("transcribe_with_sarvam")
+async def transcribe_with_sarvam(audio_data: bytes, http_client: httpx.AsyncClient = None, audio_hash: str = None, on_chunk=None) -> dict:
+    """
+    Transcribes (and translates) a recording, splitting long audio into chunks.
+    on_chunk, if given, is awaited with (chunk, result, num_chunks) as each chunk
+    settles; chunk carries its offset and time span, result is the raw chunk
+    result or the exception it failed with.
+    """
     try:
+        http_client = http_client or get_http_client()
         logging.info("Starting transcription with Sarvam for audio data of size: %d bytes", len(audio_data))
 
-        # Validate input type
-        if not isinstance(audio_data, bytes):
+        # Validate input type (memoryview/mmap let callers pass staged audio without copying it)
+        if not isinstance(audio_data, (bytes, bytearray, memoryview, mmap.mmap)):
             logging.error("Invalid input type: Expected bytes, got %s", type(audio_data).__name__)
             raise TypeError(f"Expected bytes-like object for audio_data, got {type(audio_data).__name__}")
 
-        # Define max chunk duration in seconds (5 minutes)
-        MAX_CHUNK_DURATION = 300
-
-        # Load audio data using pydub
-        audio = AudioSegment.from_file(io.BytesIO(audio_data), format="wav")
-        audio_duration = len(audio) / 1000  # Convert duration to seconds
+        # Return a previous result for identical audio without calling Sarvam or OpenAI
+        cache = get_transcript_cache()
+        if cache is not None:
+            audio_hash = audio_hash or await asyncio.to_thread(compute_audio_hash, audio_data)
+            cached = await cache.get(get_transcript_cache_key(audio_hash))
+            if cached is not None:
+                logging.info("Returning cached transcription for audio hash %s", audio_hash)
+                return cached
+
+        # Max chunk duration in seconds (5 minutes by default)
+        MAX_CHUNK_DURATION = CHUNK_DURATION
+
+        # PCM WAV: read the duration from the RIFF header instead of decoding the file.
+        # Anything else (MP3, compressed WAV) is decoded with pydub/ffmpeg in the audio process pool.
+        wav_info = parse_wav_header(audio_data)
+        if wav_info is not None:
+            pcm_data, pcm_info = audio_data, wav_info
+        else:
+            with stage_timer("decode"):
+                pcm_data, pcm_info = await run_in_audio_pool(decode_audio, bytes(audio_data))
+        audio_duration = pcm_info.duration
+        AUDIO_SECONDS.labels("received").inc(audio_duration)
+        set_span_attributes(audio__duration_seconds=audio_duration, audio__bytes=len(audio_data), audio__hash=audio_hash)
         logging.info("Loaded audio file with duration: %.2f seconds", audio_duration)
 
-        # If audio is shorter than the max duration, process it directly
-        if audio_duration <= MAX_CHUNK_DURATION:
+        # If audio is shorter than the max duration, process it directly (VAD always goes through the chunk plan)
+        if audio_duration <= MAX_CHUNK_DURATION and not VAD_ENABLED:
             logging.info("Audio is shorter than max chunk duration; processing directly")
-            return await transcribe_chunk(audio_data)
-
-        # Otherwise, split the audio into chunks
-        logging.info("Audio exceeds max chunk duration; splitting into chunks")
-        chunks = []
-        num_chunks = math.ceil(audio_duration / MAX_CHUNK_DURATION)
-
-        for i in range(num_chunks):
-            start_ms = i * MAX_CHUNK_DURATION * 1000
-            end_ms = min((i + 1) * MAX_CHUNK_DURATION * 1000, len(audio))
-            chunk = audio[start_ms:end_ms]
-            chunk_data = io.BytesIO()
-            chunk.export(chunk_data, format="wav")
-            chunks.append(chunk_data.getvalue())
-            logging.info("Created chunk %d/%d: Start=%.2f seconds, End=%.2f seconds", i + 1, num_chunks, start_ms / 1000, end_ms / 1000)
-
-        # Transcribe each chunk concurrently
-        logging.info("Starting concurrent transcription of %d chunks", num_chunks)
-        tasks = [transcribe_chunk(chunk_data) for chunk_data in chunks]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Merge results
-        all_segments = []
-        full_transcription = ""
-        translated_transcript = ""
-
-        for idx, result in enumerate(results):
+            plan = [{"index": 0, "offset": 0.0, "split_time": 0.0, "end_time": audio_duration}]
+            if wav_info is not None and should_preprocess(wav_info):
+                plan[0].update(start_frame=0, end_frame=wav_info.num_frames)
+                prepare = chunk_preprocessor(audio_data, wav_info, plan)
+            else:
+                prepare = listed_payloads([short_audio_payload(audio_data, wav_info, pcm_data, pcm_info)])
+            AUDIO_SECONDS.labels("sent").inc(audio_duration)
+            result = (await run_chunks(
+                _chunk_sender(plan, http_client, pcm_info.sample_rate), [0],
+                on_result=_chunk_reporter(on_chunk, plan), prepare_fn=prepare
+            ))[0]
             if isinstance(result, Exception):
-                logging.error("Error processing chunk %d: %s", idx + 1, result)
-                continue
-            logging.info("Successfully processed chunk %d", idx + 1)
-            all_segments.extend(result["audio_segments"])
-            full_transcription += result["full_transcription"]["transcript"] + " "
+                raise result
+            if cache is not None:
+                await cache.set(get_transcript_cache_key(audio_hash), result_with_rows(result))
+            return result
+
+        # Otherwise, split the audio into chunks (decoded non-WAV audio is chunked as raw PCM the same way)
+        with stage_timer("chunking"):
+            if VAD_ENABLED:
+                # Only speech is sent: silent spans are dropped and the speech regions packed into chunks
+                regions = await asyncio.to_thread(
+                    detect_speech, pcm_data, pcm_info, VAD_WINDOW_MS, VAD_ENERGY_MARGIN_DB, VAD_MIN_ENERGY_DB,
+                    VAD_ZCR_THRESHOLD, VAD_MIN_SPEECH_MS, VAD_MIN_SILENCE_MS, VAD_PADDING_MS
+                )
+                plan = pack_speech_regions(pcm_data, pcm_info, regions, MAX_CHUNK_DURATION, SILENCE_WINDOW_MS)
+                speech_seconds = sum(end - start for start, end in regions) / pcm_info.sample_rate
+                logging.info("VAD kept %.2f of %.2f seconds of audio in %d chunks", speech_seconds, audio_duration, len(plan))
+            else:
+                # Splits snap to nearby silence; each chunk is a synthesized header plus a zero-copy slice
+                logging.info("Audio exceeds max chunk duration; splitting into chunks")
+                plan = plan_chunks(pcm_data, pcm_info, MAX_CHUNK_DURATION, CHUNK_OVERLAP, SILENCE_SEARCH_WINDOW, SILENCE_WINDOW_MS)
+            # Preprocessed payloads are built one chunk at a time as the scheduler is ready to send them
+            if should_preprocess(pcm_info):
+                prepare = chunk_preprocessor(pcm_data, pcm_info, plan)
+            else:
+                prepare = listed_payloads([(reader, "wav") for reader in build_chunk_readers(pcm_data, pcm_info, plan)])
+        AUDIO_SECONDS.labels("sent").inc(sum(chunk_audio_seconds(chunk, pcm_info.sample_rate) for chunk in plan))
+        num_chunks = len(plan)
+        for chunk in plan:
+            logging.info("Created chunk %d/%d: Start=%.2f seconds, End=%.2f seconds", chunk["index"] + 1, num_chunks, chunk["offset"], chunk["end_time"])
+
+        # Transcribe chunks under the concurrency/rate limits, retrying only the chunks that fail
+        logging.info("Starting concurrent transcription of %d chunks", num_chunks)
+        set_span_attributes(chunks=num_chunks)
+        results = await run_chunks(
+            _chunk_sender(plan, http_client, pcm_info.sample_rate), list(range(num_chunks)),
+            on_result=_chunk_reporter(on_chunk, plan), prepare_fn=prepare
+        )
 
-            # Include the translated transcription if it exists
-            if "translated_transcript" in result:
-                translated_transcript += result["translated_transcript"] + " "
+        with stage_timer("merge"):
+            trimmed = []
+            result, failed_chunks = merge_chunk_results(results, plan, trimmed)
+        if trimmed:
+            await retranslate_segments(result["audio_segments"], trimmed)
 
-        # Prepare final result
-        result = {
-            "message": "success",
-            "audio_segments": all_segments,
-            "full_transcription": {"transcript": full_transcription.strip()},
-            "full_diarization": all_segments,
-            "translated_transcript": translated_transcript.strip() if translated_transcript else None,
-            "lang": " "  # Language merging logic can be added if needed
-        }
+        # Only cache complete transcripts so a retry can recover failed chunks
+        if cache is not None and not failed_chunks:
+            await cache.set(get_transcript_cache_key(audio_hash), result_with_rows(result))
 
         logging.info("Successfully completed transcription with %d chunks processed", num_chunks)
         return result
@@ -93,37 +164,225 @@ async def transcribe_with_sarvam(audio_data: bytes) -> dict:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 
+def short_audio_payload(audio_data, wav_info: WavInfo, pcm_data, pcm_info: WavInfo):
+    """
+    (payload, audio_format) for audio sent whole without preprocessing: PCM
+    WAV and MP3 as uploaded, anything else pydub decoded (compressed WAV, ...)
+    as the decoded PCM wrapped in a WAV header.
+    """
+    if wav_info is not None or detect_audio_format(audio_data) == "mp3":
+        audio_format = "wav" if wav_info is not None else "mp3"
+        return (audio_data if isinstance(audio_data, bytes) else MemoryReader([audio_data])), audio_format
+    return MemoryReader([build_wav_header(pcm_info, len(pcm_data)), memoryview(pcm_data)]), "wav"
+
+
+def should_preprocess(info: WavInfo) -> bool:
+    return PREPROCESS_AUDIO and needs_preprocessing(info, PREPROCESS_SAMPLE_RATE, PREPROCESS_FORMAT)
+
+
+def _get_preprocess_slots() -> asyncio.Semaphore:
+    global _preprocess_slots
+    if _preprocess_slots is None:
+        _preprocess_slots = asyncio.Semaphore(AUDIO_POOL_WORKERS)
+    return _preprocess_slots
+
+
+def chunk_preprocessor(pcm_data, info: WavInfo, plan: list):
+    """
+    prepare_fn for run_chunks: downmixes/resamples (and optionally encodes)
+    a planned chunk in the audio process pool when the scheduler is about to
+    send it. Raw slices are copied for the worker only while one of
+    AUDIO_POOL_WORKERS process-wide slots is held, so the raw copies are
+    bounded across all requests, not per request.
+    """
+    async def prepare(index: int):
+        chunk = plan[index]
+        with stage_timer("preprocess"):
+            async with _get_preprocess_slots():
+                pcm = b"".join(pcm_slice(pcm_data, info, start, end) for start, end in chunk_frame_ranges(chunk))
+                payload, audio_format = await run_in_audio_pool(preprocess_chunk, pcm, info, PREPROCESS_SAMPLE_RATE, PREPROCESS_FORMAT)
+        logging.info(
+            "Preprocessed chunk %d to %d Hz mono %s: %d -> %d bytes",
+            index + 1, min(info.sample_rate, PREPROCESS_SAMPLE_RATE), audio_format, len(pcm), len(payload)
+        )
+        return index, payload, audio_format
+    return prepare
+
+
+def listed_payloads(payloads: list):
+    """prepare_fn for run_chunks over payloads that already exist, as (payload, audio_format) per chunk."""
+    async def prepare(index: int):
+        payload, audio_format = payloads[index]
+        return index, payload, audio_format
+    return prepare
+
+
+def format_transcription_response(response: dict, segment_format: str = "rows") -> dict:
+    """
+    Shapes a successful transcribe_with_sarvam result into the API's {"results": ...} body.
+    segment_format "columnar" returns audio_segments as parallel lists (see SegmentTable.to_columns).
+    """
+    return {"results": {
+        "transcripts": response.get("full_transcription", ""),
+        "translated_transcript": response.get("translated_transcript", ""),
+        "audio_segments": segments_as(response.get("audio_segments", ""), segment_format),
+        # Spans whose chunk failed after retries, so callers can re-run just those
+        "complete": response.get("complete", True),
+        "missing_spans": response.get("missing_spans", []),
+    }}
+
+
+def chunk_audio_seconds(chunk: dict, sample_rate: int) -> float:
+    """Seconds of audio actually sent for a planned chunk (only its speech regions under VAD)."""
+    if "start_frame" in chunk:
+        return sum(end - start for start, end in chunk_frame_ranges(chunk)) / sample_rate
+    return chunk["end_time"] - chunk["offset"]
+
+
+def _chunk_sender(plan: list, http_client: httpx.AsyncClient, sample_rate: int):
+    """chunk_fn for run_chunks: sends a prepared (index, payload, audio_format) in a span describing plan[index]."""
+    async def send(prepared: tuple):
+        index, payload, audio_format = prepared
+        attributes = {
+            "chunk.index": index,
+            "chunk.offset_seconds": plan[index]["offset"],
+            "audio.duration_seconds": chunk_audio_seconds(plan[index], sample_rate),
+            "audio.format": audio_format,
+        }
+        with start_span("chunk", attributes), log_context(chunk=index):
+            return await transcribe_chunk(payload, http_client, audio_format=audio_format)
+    return send
+
+
+def _chunk_reporter(on_chunk, plan: list):
+    """Adapts an on_chunk(chunk, result, num_chunks) callback to run_chunks' on_result."""
+    if on_chunk is None:
+        return None
+
+    async def report(index: int, result):
+        await on_chunk(plan[index], result, len(plan))
+    return report
+
+
+def chunk_partial_result(chunk: dict, result) -> dict:
+    """
+    Standalone view of one settled chunk for partial results: its time span
+    and either its segments re-based to absolute time or the error it failed with.
+    """
+    partial = {
+        "chunk": chunk["index"],
+        "start_time": round(chunk["split_time"], 3),
+        "end_time": round(chunk["end_time"], 3)
+    }
+    if isinstance(result, Exception):
+        partial["error"] = getattr(result, "detail", None) or str(result)
+    else:
+        partial["audio_segments"] = rebase_segments(result["audio_segments"], chunk).to_rows()
+    return partial
+
+
+async def retranslate_segments(segments: SegmentTable, trimmed: list):
+    """Translates again the segments whose overlap words were dropped; trimmed holds (index, language code)."""
+    by_language = {}
+    for index, language_code in trimmed:
+        by_language.setdefault(language_code, []).append(index)
+    for language_code, indexes in by_language.items():
+        translations = await translate_batch([segments.transcripts[i] for i in indexes], language_code)
+        for i, translation in zip(indexes, translations):
+            segments.translations[i] = translation
+
+
+def merge_chunk_results(results: list, plan: list, trimmed: list = None):
+    """
+    Merges per-chunk results in order. Segment timestamps are re-based to
+    absolute file time and anything heard twice in a chunk overlap is kept
+    only once. Chunks that failed are listed in missing_spans with the time
+    range they own. Returns the merged result and the number of failed chunks;
+    segments trimmed at an overlap are appended to trimmed as (index, language
+    code) for retranslate_segments.
+    """
+    all_segments = SegmentTable()
+    missing_spans = []
+    full_transcription = ""
+    translated_transcript = ""
+    previous_transcript = ""
+
+    failed_chunks = 0
+    for idx, (result, chunk) in enumerate(zip(results, plan)):
+        if isinstance(result, Exception):
+            logging.error("Error processing chunk %d: %s", idx + 1, result)
+            failed_chunks += 1
+            previous_transcript = ""
+            missing_spans.append({
+                "chunk": idx,
+                "start_time": round(chunk["split_time"], 3),
+                "end_time": round(chunk["end_time"], 3),
+                "error": getattr(result, "detail", None) or str(result)
+            })
+            continue
+        logging.info("Successfully processed chunk %d", idx + 1)
+        previous_segment_transcript = all_segments.transcripts[-1] if len(all_segments) and previous_transcript else None
+        chunk_trimmed = []
+        rebase_segments(result["audio_segments"], chunk, previous_segment_transcript, out=all_segments, trimmed=chunk_trimmed)
+        if trimmed is not None:
+            trimmed.extend((index, result.get("lang", " ")) for index in chunk_trimmed)
+
+        chunk_transcript = result["full_transcription"]["transcript"]
+        if chunk.get("offset_map"):
+            full_transcription += chunk_transcript + " "  # Packed speech chunks don't overlap
+        else:
+            full_transcription += dedupe_overlap_words(previous_transcript, chunk_transcript) + " "
+        previous_transcript = chunk_transcript
+
+        # Include the translated transcription if it exists
+        if "translated_transcript" in result:
+            translated_transcript += result["translated_transcript"] + " "
+
+    # Prepare final result
+    result = {
+        "message": "success",
+        "audio_segments": all_segments,
+        "full_transcription": {"transcript": full_transcription.strip()},
+        "full_diarization": all_segments,
+        "translated_transcript": translated_transcript.strip() if translated_transcript else None,
+        "lang": " ",  # Language merging logic can be added if needed
+        "complete": not missing_spans,
+        "missing_spans": missing_spans
+    }
+    if plan and failed_chunks == len(plan):
+        result["message"] = "error"
+        result["error"] = "All chunks failed: " + "; ".join(span["error"] for span in missing_spans)
+    return result, failed_chunks
+
+
 # @log_execution_time
-async def transcribe_chunk(audio_data: bytes) -> dict:
+async def transcribe_chunk(audio_data: bytes, http_client: httpx.AsyncClient = None, audio_format: str = "wav") -> dict:
     try:
+        http_client = http_client or get_http_client()
         logging.info("Starting transcription for a chunk of size: %d bytes", len(audio_data))
 
         # Prepare the file and data payload
+        file_name, mime_type = AUDIO_FORMATS.get(audio_format, AUDIO_FORMATS["wav"])
         files = {
-            "file": ("audio.wav", audio_data, "audio/wav")  # Explicitly set the MIME type
+            "file": (file_name, audio_data, mime_type)  # Explicitly set the MIME type
         }
         data = {
-            "model": "saarika:v2",
-            "with_diarization": "true",
-            "with_timestamps": "true"
+            "model": SARVAM_MODEL,
+            "with_diarization": str(SARVAM_WITH_DIARIZATION).lower(),
+            "with_timestamps": str(SARVAM_WITH_TIMESTAMPS).lower()
         }
         headers = {
             "api-subscription-key": SARVAM_API_KEY
         }
 
-        # Set a custom timeout for the request
-        timeout =  httpx.Timeout(
-            connect=30.0,   # Max time to establish a connection
-            write=30.0,     # Max time to send audio chunk
-            read=420.0,     # Max time to receive transcription (7 minutes per chunk)
-            pool=300.0      # Max time to reuse connection
-        )
-
         logging.info("Sending request to Sarvam API at %s", SARVAM_API_URL)
 
-        # Send the request to the Sarvam API
-        async with httpx.AsyncClient() as client:
-            response = await client.post(SARVAM_API_URL, headers=headers, files=files, data=data, timeout=timeout)
+        # Send the request over the shared pooled client (timeouts are set on the client)
+        BYTES.labels("out", "sarvam").inc(len(audio_data))
+        with stage_timer("sarvam") as span, CHUNKS_IN_FLIGHT.track_inprogress():
+            span.set_attribute("payload.bytes", len(audio_data))
+            response = await http_client.post(SARVAM_API_URL, headers=headers, files=files, data=data)
+            span.set_attribute("http.status_code", response.status_code)
 
         # Raise an exception for HTTP errors
         response.raise_for_status()
@@ -138,23 +397,23 @@ async def transcribe_chunk(audio_data: bytes) -> dict:
         transcription_result = response_data.get("transcript", "")
         full_transcription = {"transcript": transcription_result}
 
-        # Format utterances into the desired structure
-        audio_segments = []
-        for utterance in utterances:
-            # Check if the utterance needs translation
-            transcript = utterance.get("transcript", "")
-            translated_transcript = await translate_text(transcript, response_data.get("language_code", " ")) if response_data.get("language_code", " ") not in ["en-IN", "hi-IN"] else ""
-
-            # Format each utterance
-            segment = {
-                "start_time": utterance.get("start_time_seconds"),
-                "end_time": utterance.get("end_time_seconds"),
-                "speaker_label": f"spk_{utterance.get('speaker_id')}",
-                "transcript": transcript,
-                "": translated_transcript,
-                # "translated_transcript": translated_transcript
-            }
-            audio_segments.append(segment)
+        # Translate all utterances in a few batched requests instead of one call per utterance
+        transcripts = [utterance.get("transcript", "") for utterance in utterances]
+        if response_data.get("language_code", " ") not in ["en-IN", "hi-IN"]:
+            translations = await translate_batch(transcripts, response_data.get("language_code", " "))
+        else:
+            translations = ["" for _ in transcripts]
+
+        # Format utterances into the desired structure, column-wise (rendered per segment by SegmentTable.to_rows)
+        audio_segments = SegmentTable()
+        for utterance, transcript, translated_transcript in zip(utterances, transcripts, translations):
+            audio_segments.append(
+                utterance.get("start_time_seconds"),
+                utterance.get("end_time_seconds"),
+                f"spk_{utterance.get('speaker_id')}",
+                transcript,
+                translated_transcript,
+            )
 
         # Prepare final result
         result = {
@@ -168,47 +427,37 @@ async def transcribe_chunk(audio_data: bytes) -> dict:
         # Check language code and if not English or Hindi, translate using GPT-4 model
         language_code = response_data.get("language_code", "").lower()
         if language_code not in ["en", "hi"]:
-            # Translate the full transcription using GPT-4 model
-            translated_transcript = await translate_text(full_transcription["transcript"], language_code)
+            # Assemble the full translation from the utterance translations instead of a second
+            # API call; only untranslated chunks (no utterances, en/hi) fall back to translate_text
+            if any(translations):
+                translated_transcript = " ".join(text for text in translations if text)
+            else:
+                translated_transcript = await translate_text(full_transcription["transcript"], language_code)
             result["translated_transcript"] = translated_transcript
             logging.info("Translated diarized transcript added for language code: %s", language_code)
 
         logging.info("Successfully completed transcription for the chunk")
         return result
 
-    except httpx.ReadTimeout:
+    except httpx.TimeoutException as e:
+        record_upstream_error("sarvam", e)
         logging.error("Timeout occurred while waiting for Sarvam API response")
         raise HTTPException(status_code=504, detail="The request to Sarvam API timed out.")
-    except httpx.RequestError as e:
+    except httpx.HTTPStatusError as e:
+        # Keep the upstream status so the scheduler can tell 429/5xx (retry) from 4xx (fail)
+        record_upstream_error("sarvam", e)
+        logging.error("Sarvam API returned %s: %s", e.response.status_code, e.response.text)
+        raise HTTPException(status_code=e.response.status_code, detail=f"Error from Sarvam API: {e.response.text}")
+    except httpx.TransportError as e:
+        # Connection refused or reset: retried like a 502 from a proxy
+        record_upstream_error("sarvam", e)
         logging.error("Request error while communicating with Sarvam API: %s", str(e))
-        raise HTTPException(status_code=500, detail=f"Error communicating with Sarvam API: {e}")
+        raise HTTPException(status_code=502, detail=f"Error communicating with Sarvam API: {e}")
+    except HTTPException:
+        # Already carries the status of the call that failed (e.g. translation)
+        raise
     except Exception as e:
-        print(response.json())
+        # Not an upstream failure (a bad response body, a bug): raised as-is so it isn't retried
         logging.error("Unexpected error during chunk transcription: %s", str(e))
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+        raise
 
-
-async def translate_text(text: str, source_lang: str) -> str:
-    """
-    Translates text to English using a model like GPT-4 or any translation API.
-    You can replace this with the translation logic of your choice.
-    """
-    try:
-        translation = client.chat.completions.create(
-            model="gpt-4o-mini", 
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"You are a translator that translates text from {source_lang} to English:\n\n{text}"
-                },
-                {
-                    "role": "user",
-                    "content": text
-                }
-            ],
-            max_tokens=1024
-        )
-        return translation.choices[0].message.content
-    except Exception as e:
-        logging.error("Error during translation with GPT-4: %s", str(e))
-        return ""  
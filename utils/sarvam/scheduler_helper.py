@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import random
+import time
+import httpx
+from fastapi import HTTPException
+from utils.configs.config import (
+    SARVAM_GLOBAL_CONCURRENCY,
+    SARVAM_REQUEST_CONCURRENCY,
+    SARVAM_RATE_LIMIT,
+    SARVAM_RATE_BURST,
+    CHUNK_MAX_RETRIES,
+    CHUNK_RETRY_BASE_DELAY,
+    CHUNK_RETRY_MAX_DELAY,
+)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Process-wide limits shared by every request, created on first use
+_global_semaphore = None
+_rate_limiter = None
+
+
+def get_global_semaphore() -> asyncio.Semaphore:
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(SARVAM_GLOBAL_CONCURRENCY)
+    return _global_semaphore
+
+
+def get_rate_limiter() -> TokenBucket:
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucket(SARVAM_RATE_LIMIT, SARVAM_RATE_BURST)
+    return _rate_limiter
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx responses, timeouts and transport errors are retried; anything else fails the chunk immediately."""
+    if isinstance(error, HTTPException):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError, httpx.TransportError))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(CHUNK_RETRY_MAX_DELAY, CHUNK_RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+async def run_chunks(chunk_fn, chunks: list, request_concurrency: int = SARVAM_REQUEST_CONCURRENCY, max_retries: int = CHUNK_MAX_RETRIES, on_result=None, prepare_fn=None) -> list:
+    """
+    Runs chunk_fn over every chunk under the per-request and global concurrency
+    limits and the shared rate limiter. Failed chunks are retried on their own
+    with exponential backoff. Returns one entry per chunk, in order: the result,
+    or the last exception if the chunk never succeeded.
+
+    on_result, if given, is awaited with (index, result) as each chunk settles.
+    prepare_fn, if given, turns a chunk into what chunk_fn is called with
+    (e.g. builds its payload). It runs once per chunk inside the per-request
+    slot, outside the global one, so at most request_concurrency prepared
+    chunks are held per request and retries reuse them.
+    """
+    request_semaphore = asyncio.Semaphore(request_concurrency)
+
+    async def run_one(index: int, chunk):
+        result = await attempt_chunk(index, chunk)
+        if on_result is not None:
+            try:
+                await on_result(index, result)
+            except Exception as e:
+                logging.error("Chunk %d result callback failed: %s", index + 1, str(e))
+        return result
+
+    async def attempt_chunk(index: int, chunk):
+        async with request_semaphore:
+            if prepare_fn is not None:
+                try:
+                    chunk = await prepare_fn(chunk)
+                except Exception as e:
+                    logging.error("Chunk %d could not be prepared: %s", index + 1, e)
+                    return e
+            for attempt in range(max_retries + 1):
+                # Hold the global slot only while calling upstream, not while backing off
+                async with get_global_semaphore():
+                    await get_rate_limiter().acquire()
+                    try:
+                        return await chunk_fn(chunk)
+                    except Exception as e:
+                        error = e
+                if attempt == max_retries or not is_retryable(error):
+                    logging.error("Chunk %d failed after %d attempts: %s", index + 1, attempt + 1, error)
+                    return error
+                delay = backoff_delay(attempt)
+                logging.warning("Chunk %d attempt %d failed (%s); retrying in %.1f seconds", index + 1, attempt + 1, error, delay)
+                await asyncio.sleep(delay)
+
+    return await asyncio.gather(*(run_one(i, chunk) for i, chunk in enumerate(chunks)))
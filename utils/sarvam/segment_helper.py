@@ -0,0 +1,129 @@
+import math
+from array import array
+import orjson
+from fastapi.responses import JSONResponse
+
+# Segment layouts a response can carry (see format_transcription_response)
+SEGMENT_FORMATS = ("rows", "columnar")
+
+
+class SegmentTable:
+    """
+    Diarized segments stored column-wise: start/end times in float arrays
+    (NaN when Sarvam sent none), speakers as indexes into a small string
+    table, transcripts and translations in plain lists. A two-hour recording
+    has thousands of segments; this holds them without a dict per segment.
+    """
+    __slots__ = ("start_times", "end_times", "speaker_ids", "speakers", "_speaker_index", "transcripts", "translations")
+
+    def __init__(self):
+        self.start_times = array("d")
+        self.end_times = array("d")
+        self.speaker_ids = array("H")
+        self.speakers = []
+        self._speaker_index = {}
+        self.transcripts = []
+        self.translations = []
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "SegmentTable":
+        """Builds a table from segment dicts, e.g. a transcript read back from the cache."""
+        table = cls()
+        for row in rows:
+            table.append(row.get("start_time"), row.get("end_time"), row.get("speaker_label"), row.get("transcript", ""), row.get("", ""))
+        return table
+
+    def __len__(self) -> int:
+        return len(self.transcripts)
+
+    def append(self, start_time, end_time, speaker_label: str, transcript: str, translation: str = ""):
+        speaker_id = self._speaker_index.get(speaker_label)
+        if speaker_id is None:
+            speaker_id = self._speaker_index[speaker_label] = len(self.speakers)
+            self.speakers.append(speaker_label)
+        self.start_times.append(math.nan if start_time is None else start_time)
+        self.end_times.append(math.nan if end_time is None else end_time)
+        self.speaker_ids.append(speaker_id)
+        self.transcripts.append(transcript)
+        self.translations.append(translation)
+
+    def start_time(self, i: int):
+        value = self.start_times[i]
+        return None if value != value else value
+
+    def end_time(self, i: int):
+        value = self.end_times[i]
+        return None if value != value else value
+
+    def speaker_label(self, i: int) -> str:
+        return self.speakers[self.speaker_ids[i]]
+
+    def to_rows(self) -> list:
+        """The segments as the API's per-segment dicts."""
+        return [
+            {
+                "start_time": self.start_time(i),
+                "end_time": self.end_time(i),
+                "speaker_label": self.speaker_label(i),
+                "transcript": self.transcripts[i],
+                "": self.translations[i],
+            }
+            for i in range(len(self))
+        ]
+
+    def to_columns(self) -> dict:
+        """
+        Columnar layout: one list per field plus the speaker table, so the
+        response carries each key once instead of once per segment.
+        """
+        return {
+            "format": "columnar",
+            "count": len(self),
+            "speakers": list(self.speakers),
+            "start_time": [None if value != value else value for value in self.start_times],
+            "end_time": [None if value != value else value for value in self.end_times],
+            "speaker": self.speaker_ids.tolist(),
+            "transcript": list(self.transcripts),
+            "translated_transcript": list(self.translations),
+        }
+
+
+def segments_as(segments, segment_format: str = "rows"):
+    """Renders a SegmentTable, or segment dicts from the cache, in the requested layout."""
+    if segment_format == "columnar":
+        table = segments if isinstance(segments, SegmentTable) else SegmentTable.from_rows(segments or [])
+        return table.to_columns()
+    if isinstance(segments, SegmentTable):
+        return segments.to_rows()
+    return segments
+
+
+def result_with_rows(result: dict) -> dict:
+    """
+    Copy of a transcription result with its segments as plain dicts, for
+    stores that serialize it themselves (cache backends, Mongo). The
+    diarization shares the same list rather than a second copy.
+    """
+    segments = result.get("audio_segments")
+    if not isinstance(segments, SegmentTable):
+        return result
+    rows = segments.to_rows()
+    return {**result, "audio_segments": rows, "full_diarization": rows}
+
+
+def _json_default(value):
+    if isinstance(value, SegmentTable):
+        return value.to_rows()
+    return str(value)  # Same fallback as the json.dumps(default=str) calls elsewhere
+
+
+def dumps_json(content) -> bytes:
+    """orjson encoding for responses and stream events; NaN/inf become null."""
+    return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of jsonable_encoder and json.dumps."""
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+from utils.configs.config import (
+    OPENAI_BASE_URL,
+    TRANSLATION_MODEL,
+    TRANSLATION_BATCH_SIZE,
+    TRANSLATION_BATCH_MAX_CHARS,
+    TRANSLATION_CONCURRENCY,
+)
+from utils.metrics.metrics_helper import timed_stage, record_upstream_error
+from utils.tracing.tracing_helper import set_span_attributes
+from utils.cache.cache_helper import get_translation_cache, build_translation_key
+
+# Shared async OpenAI client and a process-wide cap on in-flight translation requests
+_openai_client = None
+_translation_semaphore = None
+
+
+def get_openai_client():
+    """
+    Returns the shared AsyncOpenAI client. OPENAI_BASE_URL can point it at a
+    local stub server. openai is imported here, on the first translation, as
+    it is the slowest import of the app.
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import AsyncOpenAI
+        _openai_client = AsyncOpenAI(base_url=OPENAI_BASE_URL or None)
+    return _openai_client
+
+
+def get_translation_semaphore() -> asyncio.Semaphore:
+    global _translation_semaphore
+    if _translation_semaphore is None:
+        _translation_semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+    return _translation_semaphore
+
+
+async def translate_text(text: str, source_lang: str) -> str:
+    """
+    Translates text to English using a model like GPT-4 or any translation API.
+    You can replace this with the translation logic of your choice.
+    Served from the translation memo when the same text was translated before.
+    """
+    if not text:
+        return ""
+    cache = get_translation_cache()
+    key = build_translation_key(text, source_lang, TRANSLATION_MODEL)
+    if cache is not None:
+        cached = (await cache.get_many([key])).get(key)
+        if cached is not None:
+            return cached
+    translated = await _request_translation(text, source_lang)
+    if cache is not None and translated:
+        await cache.set_many({key: translated})
+    return translated
+
+
+@timed_stage("translation")
+async def _request_translation(text: str, source_lang: str) -> str:
+    """One chat-completions call for a single text."""
+    set_span_attributes(translation__items=1, translation__chars=len(text), translation__source_lang=source_lang)
+    try:
+        async with get_translation_semaphore():
+            translation = await get_openai_client().chat.completions.create(
+                model=TRANSLATION_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": f"You are a translator that translates text from {source_lang} to English:\n\n{text}"
+                    },
+                    {
+                        "role": "user",
+                        "content": text
+                    }
+                ],
+                max_tokens=1024
+            )
+        return translation.choices[0].message.content
+    except Exception as e:
+        record_upstream_error("openai", e)
+        logging.error("Error during translation with GPT-4: %s", str(e))
+        return ""
+
+
+def build_translation_batches(texts: list) -> list:
+    """
+    Packs (id, text) pairs into batches bounded by TRANSLATION_BATCH_SIZE items
+    and TRANSLATION_BATCH_MAX_CHARS characters. Empty texts are skipped.
+    """
+    batches = []
+    current = []
+    current_chars = 0
+    for idx, text in enumerate(texts):
+        if not text:
+            continue
+        if current and (len(current) >= TRANSLATION_BATCH_SIZE or current_chars + len(text) > TRANSLATION_BATCH_MAX_CHARS):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append((str(idx), text))
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+@timed_stage("translation")
+async def _translate_one_batch(batch: list, source_lang: str) -> dict:
+    """Sends one batch as a JSON object of id -> text and returns id -> translation."""
+    payload = json.dumps({"utterances": dict(batch)}, ensure_ascii=False)
+    set_span_attributes(translation__items=len(batch), translation__chars=len(payload), translation__source_lang=source_lang)
+    try:
+        async with get_translation_semaphore():
+            translation = await get_openai_client().chat.completions.create(
+                model=TRANSLATION_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            f"You are a translator that translates text from {source_lang} to English. "
+                            "You receive a JSON object whose \"utterances\" field maps ids to utterances. "
+                            "Reply with a JSON object whose \"translations\" field maps every same id to its "
+                            "English translation. Never merge, split, drop or rename ids."
+                        )
+                    },
+                    {
+                        "role": "user",
+                        "content": payload
+                    }
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=4096
+            )
+        translations = json.loads(translation.choices[0].message.content).get("translations", {})
+        return {str(k): v for k, v in translations.items() if isinstance(v, str)}
+    except Exception as e:
+        record_upstream_error("openai", e)
+        logging.error("Error during batched translation of %d utterances: %s", len(batch), str(e))
+        return {}
+
+
+async def translate_batch(texts: list, source_lang: str) -> list:
+    """
+    Translates many utterances with a few batched requests run concurrently.
+    Returns translations in the same order as texts. Repeated utterances
+    (same normalized text and language) are translated once, and anything in
+    the translation memo is not sent at all. Ids the model dropped are retried
+    one by one so every segment still gets its own translation.
+    """
+    cache = get_translation_cache()
+    keys = [build_translation_key(text, source_lang, TRANSLATION_MODEL) if text else None for text in texts]
+
+    # One representative text per distinct key
+    unique = {}
+    for key, text in zip(keys, texts):
+        if key is not None and key not in unique:
+            unique[key] = text
+
+    translated = await cache.get_many(list(unique)) if cache is not None else {}
+    pending = [(key, text) for key, text in unique.items() if key not in translated]
+    logging.info(
+        "Translating %d utterances: %d distinct, %d from the translation memo",
+        len(texts), len(unique), len(unique) - len(pending)
+    )
+
+    batches = build_translation_batches([text for _, text in pending])
+    if batches:
+        logging.info("Translating %d utterances in %d batches", len(pending), len(batches))
+        replies = await asyncio.gather(*(_translate_one_batch(batch, source_lang) for batch in batches))
+
+        # Keep only ids that were sent (all digit strings): the model can invent or mangle ids
+        sent_ids = {idx for batch in batches for idx, _ in batch}
+        fresh = {}
+        unknown = 0
+        for reply in replies:
+            for idx, text in reply.items():
+                if idx in sent_ids and idx.isdigit():
+                    fresh[idx] = text
+                else:
+                    unknown += 1
+        if unknown:
+            logging.warning("Ignoring %d translations with ids that were not sent", unknown)
+
+        missing = [(idx, text) for batch in batches for idx, text in batch if idx not in fresh]
+        if missing:
+            logging.warning("Batched translation missed %d utterances; translating individually", len(missing))
+            fallbacks = await asyncio.gather(*(_request_translation(text, source_lang) for _, text in missing))
+            for (idx, _), text in zip(missing, fallbacks):
+                fresh[idx] = text
+
+        new_entries = {pending[int(idx)][0]: text for idx, text in fresh.items() if text}
+        translated.update(new_entries)
+        if cache is not None:
+            await cache.set_many(new_entries)
+
+    return [translated.get(key, "") if key is not None else "" for key in keys]
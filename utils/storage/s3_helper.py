@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+from utils.metrics.metrics_helper import stage_timer, BYTES
+from utils.configs.config import S3_PART_SIZE, S3_UPLOAD_CONCURRENCY, MAX_UPLOAD_BYTES, INGEST_READ_CHUNK_SIZE
+
+
+class UploadTooLargeError(Exception):
+    """Raised when a streamed upload exceeds MAX_UPLOAD_BYTES."""
+
+
+async def iter_upload_file(audio, chunk_size: int = INGEST_READ_CHUNK_SIZE):
+    """Yields an UploadFile in bounded chunks instead of reading it whole."""
+    while True:
+        chunk = await audio.read(chunk_size)
+        if not chunk:
+            break
+        BYTES.labels("in", "upload").inc(len(chunk))
+        yield chunk
+
+
+async def iter_url(audio_url: str, http_client, chunk_size: int = INGEST_READ_CHUNK_SIZE):
+    """Streams a URL in bounded chunks over the shared async HTTP client."""
+    async with http_client.stream("GET", audio_url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes(chunk_size):
+            BYTES.labels("in", "url").inc(len(chunk))
+            yield chunk
+
+
+async def iter_s3_body(body, chunk_size: int = INGEST_READ_CHUNK_SIZE):
+    """Streams an S3 object's body (a blocking StreamingBody) in bounded chunks, reading from a worker thread."""
+    while True:
+        chunk = await asyncio.to_thread(body.read, chunk_size)
+        if not chunk:
+            break
+        BYTES.labels("in", "s3").inc(len(chunk))
+        yield chunk
+
+
+async def stream_to_s3(
+    chunks,
+    s3_key: str,
+    part_size: int = S3_PART_SIZE,
+    max_concurrency: int = S3_UPLOAD_CONCURRENCY,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+) -> dict:
+    """
+    Pipes an async iterator of bytes into an S3 multipart upload.
+    At most max_concurrency parts are in flight (uploaded from a thread pool)
+    plus one part being filled, so memory stays O(part_size). The SHA-256 of
+    the stream is computed on the way through for the transcript cache.
+    Inputs smaller than one part go through a single put_object.
+    """
+    from parameters import s3_client, AWS_BUCKET_NAME  # Opens the S3/Mongo clients on first use, not at import
+    sha = hashlib.sha256()
+    buffer = bytearray()
+    total_bytes = 0
+    upload_id = None
+    part_number = 0
+    parts = []
+    in_flight = set()
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def upload_part(number: int, body: bytes):
+        try:
+            with stage_timer("s3_put"):
+                response = await asyncio.to_thread(
+                    s3_client.upload_part,
+                    Bucket=AWS_BUCKET_NAME, Key=s3_key, UploadId=upload_id,
+                    PartNumber=number, Body=body
+                )
+            parts.append({"PartNumber": number, "ETag": response["ETag"]})
+        finally:
+            slots.release()
+
+    async def flush_part():
+        nonlocal upload_id, buffer, part_number
+        if upload_id is None:
+            response = await asyncio.to_thread(s3_client.create_multipart_upload, Bucket=AWS_BUCKET_NAME, Key=s3_key)
+            upload_id = response["UploadId"]
+        await slots.acquire()
+        body = bytes(buffer)
+        buffer = bytearray()
+        part_number += 1
+        in_flight.add(asyncio.create_task(upload_part(part_number, body)))
+
+    try:
+        async for chunk in chunks:
+            total_bytes += len(chunk)
+            if total_bytes > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+            sha.update(chunk)
+            buffer += chunk
+            if len(buffer) >= part_size:
+                await flush_part()
+            # Surface a failed part early instead of streaming the rest of the file
+            for task in [t for t in in_flight if t.done()]:
+                in_flight.discard(task)
+                task.result()
+
+        if upload_id is None:
+            with stage_timer("s3_put"):
+                await asyncio.to_thread(s3_client.put_object, Bucket=AWS_BUCKET_NAME, Key=s3_key, Body=bytes(buffer))
+        else:
+            if buffer:
+                await flush_part()
+            await asyncio.gather(*list(in_flight))
+            await asyncio.to_thread(
+                s3_client.complete_multipart_upload,
+                Bucket=AWS_BUCKET_NAME, Key=s3_key, UploadId=upload_id,
+                MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])}
+            )
+    except BaseException:
+        for task in list(in_flight):
+            task.cancel()
+        if upload_id is not None:
+            try:
+                await asyncio.to_thread(s3_client.abort_multipart_upload, Bucket=AWS_BUCKET_NAME, Key=s3_key, UploadId=upload_id)
+            except Exception as e:
+                logging.error("Failed to abort multipart upload for %s: %s", s3_key, str(e))
+        raise
+
+    logging.info("Streamed %d bytes to S3 key %s in %d parts", total_bytes, s3_key, max(len(parts), 1))
+    return {"s3_key": s3_key, "size": total_bytes, "audio_hash": sha.hexdigest()}
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from utils.configs.config import SPOOL_DIR, MAX_UPLOAD_BYTES, INGEST_READ_CHUNK_SIZE
+from utils.storage.s3_helper import stream_to_s3, UploadTooLargeError
+
+# Archival uploads still running after their request returned
+_background_archives = set()
+
+
+class SpooledAudio:
+    """
+    Audio staged in a local spool file. Every consumer (transcription, S3
+    archival) holds a reference; the file is deleted when the last one releases.
+    """
+
+    def __init__(self, path: str, size: int, audio_hash: str):
+        self.path = path
+        self.size = size
+        self.audio_hash = audio_hash
+        self._refs = 1
+        self._mmap = None
+
+    def retain(self):
+        self._refs += 1
+        return self
+
+    def release(self):
+        self._refs -= 1
+        if self._refs == 0:
+            self._close_mmap()
+        if self._refs == 0 and os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                logging.error("Failed to delete spool file %s: %s", self.path, str(e))
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def map(self):
+        """
+        Memory-maps the spool read-only so the WAV chunker can slice it
+        without loading the file. Falls back to bytes for empty files.
+        """
+        if self.size == 0:
+            return b""
+        if self._mmap is None:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _close_mmap(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Chunk slices are still referenced; the map is closed when they are collected
+                pass
+            self._mmap = None
+
+
+async def iter_file(path: str, chunk_size: int = INGEST_READ_CHUNK_SIZE):
+    """Yields a local file in bounded chunks, reading from a worker thread."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def spool_stream(chunks, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledAudio:
+    """Writes an async iterator of bytes to a spool file, hashing it on the way."""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="sarvam-", suffix=".audio", dir=SPOOL_DIR)
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+                sha.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    logging.info("Spooled %d bytes to %s", size, path)
+    return SpooledAudio(path, size, sha.hexdigest())
+
+
+async def _archive(spool: SpooledAudio, s3_key: str):
+    try:
+        await stream_to_s3(iter_file(spool.path), s3_key)
+        logging.info("Archived spool %s to S3 key %s", spool.path, s3_key)
+    except Exception as e:
+        logging.error("Background S3 archival failed for %s: %s", s3_key, str(e))
+    finally:
+        spool.release()
+
+
+def archive_in_background(spool: SpooledAudio, s3_key: str) -> asyncio.Task:
+    """Uploads the spool to S3 without blocking the request that staged it."""
+    task = asyncio.create_task(_archive(spool.retain(), s3_key))
+    _background_archives.add(task)
+    task.add_done_callback(_background_archives.discard)
+    return task
+
+
+async def drain_background_archives():
+    """Waits for pending archival uploads. Called from the FastAPI shutdown hook."""
+    if _background_archives:
+        logging.info("Waiting for %d background S3 archival uploads", len(_background_archives))
+        await asyncio.gather(*list(_background_archives), return_exceptions=True)
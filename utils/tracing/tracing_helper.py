@@ -0,0 +1,125 @@
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+from opentelemetry import trace, context, propagate
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from utils.configs.config import TRACING_EXPORTER, TRACING_FILE, TRACING_SERVICE_NAME
+
+_tracer = None
+_tracer_lock = threading.Lock()
+_trace_file = None
+
+
+def _build_exporter():
+    global _trace_file
+    if TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if TRACING_EXPORTER == "file":
+        # One JSON span per line, so the file can be grepped or loaded with pandas
+        _trace_file = open(TRACING_FILE, "a", buffering=1)
+        return ConsoleSpanExporter(out=_trace_file, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return None
+
+
+def get_tracer() -> trace.Tracer:
+    """
+    Returns the process tracer, installing the SDK provider on first use
+    (so API, worker and producer processes each set themselves up).
+    With TRACING_EXPORTER "none" spans are not recorded, but incoming trace
+    context is still passed through to outgoing calls.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                exporter = _build_exporter()
+                if exporter is not None:
+                    provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+                    provider.add_span_processor(BatchSpanProcessor(exporter))
+                    trace.set_tracer_provider(provider)
+                    logging.info("Tracing enabled for %s with the %s exporter", TRACING_SERVICE_NAME, TRACING_EXPORTER)
+                _tracer = trace.get_tracer("sarvam")
+    return _tracer
+
+
+@contextmanager
+def start_span(name: str, attributes: dict = None, parent=None, kind=trace.SpanKind.INTERNAL):
+    """Starts a span as the current span; parent is an extracted context (defaults to the current one)."""
+    with get_tracer().start_as_current_span(name, context=parent, kind=kind, attributes=attributes) as span:
+        yield span
+
+
+def begin_span(name: str, attributes: dict = None, parent=None, kind=trace.SpanKind.INTERNAL):
+    """
+    Starts a span and makes it current until end_span(); for hooks that open
+    and close a span in separate callbacks (Celery task signals).
+    Returns (span, token).
+    """
+    span = get_tracer().start_span(name, context=parent, kind=kind, attributes=attributes)
+    return span, context.attach(trace.set_span_in_context(span, parent))
+
+
+def end_span(span, token):
+    context.detach(token)
+    span.end()
+
+
+def traced(name: str):
+    """Decorator that runs an async function inside its own span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_span_attributes(**attributes):
+    """Adds attributes to the current span, skipping None values."""
+    span = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key.replace("__", "."), value)
+
+
+def inject_headers(headers: dict = None) -> dict:
+    """Adds W3C traceparent/tracestate for the current span to a header dict (HTTP or Celery)."""
+    headers = dict(headers or {})
+    get_tracer()
+    propagate.inject(headers)
+    return headers
+
+
+def extract_context(carrier) -> context.Context:
+    """Context of the remote parent described by HTTP headers or Celery message headers."""
+    return propagate.extract(carrier)
+
+
+def bind_context(coro):
+    """
+    Wraps a coroutine so it runs under the caller's trace context. Needed when
+    handing work to an event loop on another thread, which doesn't inherit
+    the caller's contextvars.
+    """
+    ctx = context.get_current()
+
+    async def run():
+        token = context.attach(ctx)
+        try:
+            return await coro
+        finally:
+            context.detach(token)
+    return run()
+
+
+def shutdown_tracing():
+    """Flushes pending spans."""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+    if _trace_file is not None:
+        _trace_file.close()